@@ -2,6 +2,7 @@ from rest_framework import serializers
 
 from authentications.models import User
 from employees.models import Department, Employee, Position
+from faceRecognition.utils import enroll_employee_face, validate_face_image
 
 
 class EmployeeNestedSerializer(serializers.ModelSerializer):
@@ -55,6 +56,13 @@ class AdminUserCreateSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({"email": "Email đã tồn tại."})
         return data
 
+    def validate_employeeImg(self, value):
+        # Ảnh không có hoặc có nhiều hơn một khuôn mặt không dùng được để nhận diện
+        error = validate_face_image(value)
+        if error:
+            raise serializers.ValidationError(error)
+        return value
+
 
 
     def create(self, validated_data):
@@ -77,7 +85,7 @@ class AdminUserCreateSerializer(serializers.ModelSerializer):
         department, _ = Department.objects.get_or_create(name=department_name)
         position, _ = Position.objects.get_or_create(name=position_name)
 
-        Employee.objects.create(
+        employee = Employee.objects.create(
             user=user,
             gender=validated_data.get('gender'),
             phone=validated_data.get('phone'),
@@ -89,6 +97,8 @@ class AdminUserCreateSerializer(serializers.ModelSerializer):
             position=position,
             employeeImg=validated_data.get('employeeImg', None)
         )
+        if employee.employeeImg:
+            enroll_employee_face(employee)
         return user
     def update(self, instance, validated_data):
         # Cập nhật thông tin User
@@ -122,5 +132,7 @@ class AdminUserCreateSerializer(serializers.ModelSerializer):
             if position:
                 instance.employee.position = position
             instance.employee.save()
+            if 'employeeImg' in validated_data:
+                enroll_employee_face(instance.employee)
         
         return instance
\ No newline at end of file
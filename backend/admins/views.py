@@ -1,3 +1,4 @@
+from django.db import IntegrityError
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -89,6 +90,10 @@ class AdminCreateAttendanceView(APIView):
             return Response(
                 {"error": "Không tìm thấy nhân viên"}, status=status.HTTP_404_NOT_FOUND
             )
+        except IntegrityError:
+            return Response(
+                {"error": "Nhân viên đã có bản ghi chấm công hôm nay"}, status=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
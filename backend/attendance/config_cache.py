@@ -0,0 +1,72 @@
+"""
+Tra cứu cấu hình giờ làm (AttendanceConfig) theo ngày, có cache trong process.
+
+Mỗi cấu hình là một phiên bản có hiệu lực từ effective_from (bỏ trống: ngày tạo) tới ngày
+trước phiên bản kế tiếp, nên đổi giờ làm không làm thay đổi cách tính của những ngày đã qua.
+Các phiên bản được sắp theo ngày hiệu lực và config_for(day) tìm bằng bisect: Attendance.save
+và các thao tác hàng loạt (mark_absent) không truy vấn AttendanceConfig cho từng bản ghi.
+
+Cache bị xoá khi AttendanceConfig được lưu / xoá trong process này (attendance/signals.py)
+và tự nạp lại sau ATTENDANCE_CONFIG_CACHE_SECONDS giây để các worker khác thấy cấu hình mới.
+"""
+import bisect
+import threading
+import time
+from datetime import date
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_cache = {"index": None, "expires": 0.0}
+
+
+def effective_date(config):
+    return config.effective_from or config.created_at.date()
+
+
+class ConfigIndex:
+    """Các phiên bản cấu hình sắp theo ngày hiệu lực; cùng ngày thì phiên bản tạo sau được dùng."""
+
+    def __init__(self, configs):
+        versions = {}
+        for config in sorted(configs, key=lambda config: (effective_date(config), config.created_at, config.id)):
+            versions[effective_date(config)] = config
+        self.dates = sorted(versions)
+        self.configs = [versions[day] for day in self.dates]
+
+    def __len__(self):
+        return len(self.configs)
+
+    def at(self, day):
+        if not self.configs:
+            return None
+        i = bisect.bisect_right(self.dates, day) - 1
+        # Ngày trước phiên bản đầu tiên: dùng phiên bản đầu tiên thay vì báo chưa cấu hình
+        return self.configs[max(i, 0)]
+
+
+def get_index():
+    now = time.monotonic()
+    with _lock:
+        if _cache["index"] is not None and now < _cache["expires"]:
+            return _cache["index"]
+    from attendance.models import AttendanceConfig
+
+    index = ConfigIndex(AttendanceConfig.objects.all())
+    with _lock:
+        _cache.update(index=index, expires=now + getattr(settings, "ATTENDANCE_CONFIG_CACHE_SECONDS", 60))
+    return index
+
+
+def config_for(day):
+    """Cấu hình có hiệu lực vào ngày day, None nếu chưa có cấu hình nào."""
+    return get_index().at(day)
+
+
+def current_config():
+    return config_for(date.today())
+
+
+def invalidate():
+    with _lock:
+        _cache["index"] = None
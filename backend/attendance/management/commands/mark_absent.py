@@ -1,22 +1,108 @@
-from datetime import date
-from django.core.management.base import BaseCommand
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef, Q
+from django.utils.dateparse import parse_date
+
+from attendance.config_cache import config_for
 from attendance.models import Attendance
 from employees.models import Employee
 
 
+def parse_day(value, name):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise CommandError(f"{name} không đúng định dạng YYYY-MM-DD: {value}")
+    return day
+
+
+def missing_employee_ids(day):
+    """Id nhân viên đang làm, đã vào làm trước hoặc trong ngày day, chưa có bản ghi chấm công ngày đó."""
+    return (
+        Employee.objects.filter(status="Active")
+        .filter(Q(start_date__isnull=True) | Q(start_date__lte=day))
+        .filter(~Exists(Attendance.objects.filter(employeeId=OuterRef("pk"), date=day)))
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
 class Command(BaseCommand):
-    help = "Đánh dấu nhân viên vắng mặt nếu chưa check-in trước 10:00 sáng"
+    help = (
+        "Đánh dấu nhân viên vắng mặt nếu chưa check-in trước 10:00 sáng. "
+        "Dùng --from/--to để bù các ngày chưa chạy; chạy lại không tạo bản ghi trùng."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="from_date", help="Ngày bắt đầu YYYY-MM-DD (mặc định: bằng --to)")
+        parser.add_argument("--to", dest="to_date", help="Ngày kết thúc YYYY-MM-DD (mặc định: hôm nay)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Số bản ghi mỗi câu INSERT")
+        parser.add_argument("--dry-run", action="store_true", help="Chỉ đếm số nhân viên sẽ bị đánh dấu, không ghi DB")
 
-    def handle(self, *args, **kwargs):
+    def handle(self, *args, **options):
         today = date.today()
-        all_employees = Employee.objects.filter(status="Active")
-        for employee in all_employees:
-            if not Attendance.objects.filter(employeeId=employee, date=today).exists():
-                Attendance.objects.create(
-                    employeeId=employee,
-                    date=today,
-                    status="Absent",
-                )
+        to_date = parse_day(options["to_date"], "--to") if options["to_date"] else today
+        from_date = parse_day(options["from_date"], "--from") if options["from_date"] else to_date
+        if from_date > to_date:
+            raise CommandError("--from phải trước hoặc bằng --to")
+        if to_date > today:
+            raise CommandError("Không thể đánh dấu vắng mặt cho ngày trong tương lai")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size phải lớn hơn 0")
+
+        total = 0
+        day = from_date
+        while day <= to_date:
+            configTime = config_for(day)
+            if not configTime:
+                raise CommandError("Thời gian Check_in/Check_out chưa được cấu hình.")
+            if options["dry_run"]:
+                count = missing_employee_ids(day).count()
+            else:
+                count = self._mark_day(day, configTime, options["batch_size"])
+            total += count
+            self.stdout.write(f"{day.isoformat()}: {count} nhân viên vắng mặt")
+            day += timedelta(days=1)
+
+        if options["dry_run"]:
+            self.stdout.write(
+                self.style.WARNING(f"[dry-run] {total} bản ghi vắng mặt sẽ được tạo, chưa ghi gì vào DB.")
+            )
+            return
         self.stdout.write(
-            self.style.SUCCESS("Đã đánh dấu vắng mặt cho các nhân viên chưa check-in.")
+            self.style.SUCCESS(f"Đã đánh dấu vắng mặt cho các nhân viên chưa check-in ({total} bản ghi).")
         )
+
+    def _mark_day(self, day, configTime, batch_size):
+        # status / working_hours tính một lần cho cả ngày: bulk_create không gọi Attendance.save
+        template = Attendance(date=day, status="Absent")
+        template.apply_config(configTime)
+        count = 0
+        batch = []
+        for employee_id in missing_employee_ids(day).iterator(chunk_size=batch_size):
+            batch.append(
+                Attendance(
+                    employeeId_id=employee_id,
+                    date=day,
+                    status=template.status,
+                    working_hours=template.working_hours,
+                )
+            )
+            if len(batch) >= batch_size:
+                count += self._insert(day, batch)
+                batch = []
+        if batch:
+            count += self._insert(day, batch)
+        return count
+
+    def _insert(self, day, batch):
+        """Ghi một lô bản ghi vắng mặt, trả về số bản ghi thực sự được tạo."""
+        # ignore_conflicts: nhân viên vừa check-in trong lúc chạy (unique employeeId, date) được giữ nguyên
+        # và không được tính; bulk_create không cho biết dòng nào bị bỏ qua nên đếm lại sau khi ghi
+        Attendance.objects.bulk_create(batch, ignore_conflicts=True)
+        return Attendance.objects.filter(
+            date=day, status="Absent", employeeId_id__in=[attendance.employeeId_id for attendance in batch]
+        ).count()
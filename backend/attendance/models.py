@@ -4,6 +4,8 @@ from django.db import models
 from employees.models import Employee
 from datetime import time, datetime
 from django.core.exceptions import ObjectDoesNotExist
+from facetechs import metrics
+from attendance.config_cache import config_for
 class Attendance(models.Model):
     # id = models.AutoField(primary_key=True)
     employeeId = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='attendance')
@@ -14,17 +16,26 @@ class Attendance(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     working_hours = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [
+            # Mỗi nhân viên chỉ có một bản ghi chấm công mỗi ngày, kể cả khi hai kiosk check-in cùng lúc
+            models.UniqueConstraint(fields=["employeeId", "date"], name="unique_attendance_employee_date"),
+        ]
+        indexes = [
+            # Phân trang lịch sử theo (date, id) và lọc theo khoảng ngày / trạng thái (xem attendance/pagination.py)
+            models.Index(fields=["date", "id"], name="attendance_date_id_idx"),
+            models.Index(fields=["status", "date", "id"], name="attendance_status_date_idx"),
+        ]
+
     def __str__(self):
         return f"Attendance record for {self.employeeId.user.full_name} - {self.date} -{self.check_in.strftime('%Y-%m-%d %H:%M:%S')}"
     
-    def save(self, *args, **kwargs):
-        configTime = AttendanceConfig.objects.order_by("-created_at").first()
-        if not configTime:
-            raise ObjectDoesNotExist("Thời gian Check_in/Check_out chưa được cấu hình.")
-        
+    def apply_config(self, configTime):
+        """Tính status (nếu chưa có) và working_hours theo cấu hình giờ làm của ngày self.date."""
         work_start = datetime.combine(self.date, configTime.check_in_time)
         work_end = datetime.combine(self.date, configTime.check_out_time)
-        
+
     # Xác định trạng thái
         if not self.status:
             if not self.check_in:
@@ -42,12 +53,22 @@ class Attendance(models.Model):
             self.working_hours =  round(delta / 3600, 2) if delta > 0 else 0
         else:
             self.working_hours = 0
+
+    @metrics.stage("attendance_save")
+    def save(self, *args, **kwargs):
+        # Cấu hình có hiệu lực vào ngày chấm công, lấy từ cache (xem attendance/config_cache.py)
+        configTime = config_for(self.date)
+        if not configTime:
+            raise ObjectDoesNotExist("Thời gian Check_in/Check_out chưa được cấu hình.")
+        self.apply_config(configTime)
         super().save(*args, **kwargs)
 
 class AttendanceConfig(models.Model):
     id = models.AutoField(primary_key=True)
     check_in_time = models.TimeField(null=True, blank=True)
     check_out_time = models.TimeField(null=True, blank=True)
+    # Áp dụng cho các ngày từ effective_from tới trước phiên bản kế tiếp; bỏ trống = ngày tạo
+    effective_from = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
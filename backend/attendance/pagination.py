@@ -0,0 +1,57 @@
+"""
+Phân trang theo con trỏ (keyset) cho lịch sử chấm công, sắp xếp theo (date, id) giảm dần.
+
+Trang sau được lấy bằng điều kiện date < d OR (date = d AND id < i) trên index (date, id)
+thay vì OFFSET, nên thời gian mỗi trang không phụ thuộc số bản ghi trong bảng hay vị trí trang.
+Con trỏ là chuỗi base64 của "date,id" của bản ghi cuối trang trước; URL trang sau được trả
+trong trường "next" (None ở trang cuối).
+"""
+import base64
+import binascii
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.utils.urls import replace_query_param
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(attendance):
+    raw = f"{attendance.date.isoformat()},{attendance.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        day, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split(",")
+        return date.fromisoformat(day), int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Con trỏ phân trang (cursor) không hợp lệ")
+
+
+def parse_limit(value):
+    if value in (None, ""):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit phải là số nguyên từ 1 đến {MAX_LIMIT}")
+    return limit
+
+
+def paginate(queryset, request):
+    """Trả về (các bản ghi của trang hiện tại, URL trang sau hoặc None); ValueError nếu tham số sai."""
+    limit = parse_limit(request.query_params.get("limit"))
+    cursor = request.query_params.get("cursor")
+    if cursor:
+        day, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(date__lt=day) | Q(date=day, id__lt=pk))
+    # Lấy thêm một bản ghi để biết còn trang sau hay không
+    rows = list(queryset.order_by("-date", "-id")[: limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, replace_query_param(request.build_absolute_uri(), "cursor", encode_cursor(rows[-1]))
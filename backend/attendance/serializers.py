@@ -1,5 +1,6 @@
 from .models import Attendance, AttendanceConfig
 from rest_framework import serializers  
+from datetime import date
 
 class AttendanceSerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,4 +14,10 @@ class AttendanceSerializer(serializers.ModelSerializer):
 class AttendanceConfigSerializer(serializers.ModelSerializer):
     class Meta:
         model = AttendanceConfig
-        fields = ['id','check_in_time', 'check_out_time', 'created_at', 'updated_at']
\ No newline at end of file
+        fields = ['id','check_in_time', 'check_out_time', 'effective_from', 'created_at', 'updated_at']
+
+    def validate_effective_from(self, value):
+        # Cấu hình mới không được thay đổi cách tính của những ngày đã qua
+        if value and value < date.today():
+            raise serializers.ValidationError("Ngày hiệu lực không được trước ngày hôm nay.")
+        return value
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from attendance import config_cache
+from attendance.models import AttendanceConfig
+
+
+@receiver(post_save, sender=AttendanceConfig)
+@receiver(post_delete, sender=AttendanceConfig)
+def attendance_config_changed(sender, instance, **kwargs):
+    # Xoá cache sau khi commit để không nạp lại dữ liệu cũ trong lúc transaction chưa xong
+    transaction.on_commit(config_cache.invalidate)
@@ -1,3 +1,88 @@
+from datetime import date, datetime, time
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from attendance import config_cache
+from attendance.models import Attendance, AttendanceConfig
+from authentications.models import User
+from employees.models import Employee
+from faceRecognition.checkin import record_attendance
+
+DAY = date(2024, 1, 2)
+
+
+def create_employee(email, **fields):
+    user = User.objects.create_user(email=email, firstName="Nhân", lastName="Viên", password=None)
+    return Employee.objects.create(user=user, **fields)
+
+
+class AttendanceTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AttendanceConfig.objects.create(
+            check_in_time=time(8, 0), check_out_time=time(17, 0), effective_from=date(2024, 1, 1)
+        )
+
+    def setUp(self):
+        # Cache cấu hình chỉ bị xoá khi transaction commit (attendance/signals.py), không xảy ra trong TestCase
+        config_cache.invalidate()
+        self.addCleanup(config_cache.invalidate)
+
+
+class RecordAttendanceTests(AttendanceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = create_employee("checkin@example.com")
+
+    def test_second_check_in_same_day_keeps_one_row(self):
+        first, _ = record_attendance(self.employee, "check_in")
+        # INSERT thứ hai vi phạm unique (employeeId, date): trả về cảnh báo, không ném IntegrityError
+        second, status = record_attendance(self.employee, "check_in")
+        self.assertEqual(first["status"], "success")
+        self.assertEqual((second["status"], status), ("warning", 200))
+        self.assertEqual(Attendance.objects.filter(employeeId=self.employee).count(), 1)
+
+    def test_check_out_updates_existing_row(self):
+        record_attendance(self.employee, "check_in")
+        payload, status = record_attendance(self.employee, "check_out")
+        self.assertEqual((payload.get("action"), status), ("check_out", 200))
+        attendance = Attendance.objects.get(employeeId=self.employee)
+        self.assertIsNotNone(attendance.check_in)
+        self.assertIsNotNone(attendance.check_out)
+
+
+class MarkAbsentTests(AttendanceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.absent = create_employee("absent@example.com", start_date=date(2024, 1, 1))
+        self.present = create_employee("present@example.com", start_date=date(2024, 1, 1))
+        Attendance.objects.create(employeeId=self.present, date=DAY, check_in=datetime(2024, 1, 2, 7, 55))
+
+    def mark_absent(self):
+        out = StringIO()
+        call_command("mark_absent", "--from", DAY.isoformat(), "--to", DAY.isoformat(), stdout=out)
+        return out.getvalue()
+
+    def test_marks_only_employees_without_attendance(self):
+        output = self.mark_absent()
+        self.assertIn("2024-01-02: 1 nhân viên vắng mặt", output)
+        self.assertEqual(Attendance.objects.get(employeeId=self.absent, date=DAY).status, "Absent")
+        self.assertEqual(Attendance.objects.get(employeeId=self.present, date=DAY).status, "Present")
+
+    def test_second_run_reports_and_creates_nothing(self):
+        self.mark_absent()
+        output = self.mark_absent()
+        self.assertIn("2024-01-02: 0 nhân viên vắng mặt", output)
+        self.assertIn("(0 bản ghi)", output)
+        self.assertEqual(Attendance.objects.filter(date=DAY).count(), 2)
+
+    def test_rows_skipped_by_conflict_are_not_counted(self):
+        # Nhân viên check-in sau khi danh sách vắng mặt đã được lấy: INSERT của họ bị bỏ qua
+        candidates = Employee.objects.order_by("pk").values_list("pk", flat=True)
+        with mock.patch("attendance.management.commands.mark_absent.missing_employee_ids", return_value=candidates):
+            output = self.mark_absent()
+        self.assertIn("2024-01-02: 1 nhân viên vắng mặt", output)
+        self.assertEqual(Attendance.objects.filter(date=DAY).count(), 2)
@@ -5,47 +5,90 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework import status
-from attendance.models import Attendance, AttendanceConfig
+from attendance.models import Attendance
 from .serializers import AttendanceSerializer, AttendanceConfigSerializer
+from attendance.config_cache import current_config
+from attendance.pagination import paginate
 
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from django.http import HttpResponse
+from facetechs import metrics
 from openpyxl.utils import get_column_letter
+STATUS_VALUES = ('Present', 'Late', 'Absent')
+
+
+def filter_attendances(attendances, params):
+    """
+    Lọc lịch sử chấm công theo query params: fromDate / toDate (DD/MM/YYYY), department (mã phòng ban),
+    status (Present / Late / Absent), employee_code. ValueError nếu tham số sai.
+    """
+    from_date = params.get('fromDate')
+    to_date = params.get('toDate')
+    try:
+        if from_date:
+            attendances = attendances.filter(date__gte=datetime.strptime(from_date.strip(), '%d/%m/%Y').date())
+        if to_date:
+            attendances = attendances.filter(date__lte=datetime.strptime(to_date.strip(), '%d/%m/%Y').date())
+    except ValueError:
+        raise ValueError("Sai định dạng ngày. Định dạng hợp lệ: DD/MM/YYYY.")
+    status_value = params.get('status')
+    if status_value:
+        if status_value not in STATUS_VALUES:
+            raise ValueError("status chỉ chấp nhận 'Present', 'Late' hoặc 'Absent'")
+        attendances = attendances.filter(status=status_value)
+    if params.get('department'):
+        attendances = attendances.filter(employeeId__department__name=params['department'])
+    if params.get('employee_code'):
+        attendances = attendances.filter(employeeId__employee_code=params['employee_code'])
+    return attendances
+
+
 class AttendanceHistoryView(APIView):
+    """
+    Lịch sử chấm công (admin: mọi nhân viên, nhân viên: của chính mình), mỗi lần một trang:
+    {"results": [...], "next": URL trang sau hoặc null}. Query params: limit (mặc định 50, tối đa 500),
+    cursor (lấy từ "next") và các bộ lọc của filter_attendances.
+    """
 
     permission_classes = [IsAuthenticated]
+    @metrics.stage("attendance_history")
     def get(self, request):
         user = request.user
-       
-        if user.is_authenticated:
-            if user.is_superuser:
-                attendances = Attendance.objects.all().order_by('-date')
-            else:
-                attendances = Attendance.objects.filter(employeeId=user.employee).order_by('-date')
-        serializer = AttendanceSerializer(attendances, many=True)
+
         if user.is_superuser:
-            data = []
-            for att in attendances:
-                data.append({
-                    "id": att.id,
-                    "date": att.date,
-                    "check_in": att.check_in,
-                    "check_out": att.check_out,
-                    "status": att.status,
-                    "created_at": att.created_at,
-                    "updated_at": att.updated_at,
-                    "employee": {
-                        "employee_code": att.employeeId.employee_code,
-                        "employeeName": att.employeeId.full_name(),
-                        "department": att.employeeId.department.name if att.employeeId.department else None,
-                    }
-                })
-            return Response(data)
+            # Một truy vấn cho cả trang thay vì 3 truy vấn (nhân viên, tài khoản, phòng ban) mỗi bản ghi
+            attendances = Attendance.objects.select_related('employeeId__user', 'employeeId__department')
         else:
-            return Response(serializer.data)
+            attendances = Attendance.objects.filter(employeeId=user.employee)
+        try:
+            attendances = filter_attendances(attendances, request.query_params)
+            page, next_url = paginate(attendances, request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not user.is_superuser:
+            serializer = AttendanceSerializer(page, many=True)
+            return Response({"results": serializer.data, "next": next_url})
+        data = []
+        for att in page:
+            data.append({
+                "id": att.id,
+                "date": att.date,
+                "check_in": att.check_in,
+                "check_out": att.check_out,
+                "status": att.status,
+                "created_at": att.created_at,
+                "updated_at": att.updated_at,
+                "employee": {
+                    "employee_code": att.employeeId.employee_code,
+                    "employeeName": att.employeeId.full_name(),
+                    "department": att.employeeId.department.name if att.employeeId.department else None,
+                }
+            })
+        return Response({"results": data, "next": next_url})
+
 
-    
 # Thêm các ánh xạ từ mã sang nhãn hiển thị
 DEPARTMENT_LABELS = {
     'it': 'Công nghệ thông tin',
@@ -63,6 +106,7 @@ STATUS_LABELS = {
 class ExportAttendanceExcel(APIView):
     permission_classes = [IsAdminUser]
 
+    @metrics.stage("attendance_export")
     def get(self, request):
         param_date = request.query_params.get('date')
         from_date = request.query_params.get('fromDate')
@@ -164,7 +208,8 @@ class ExportAttendanceExcel(APIView):
 class AttendanceConfigView(APIView):
     permission_classes = [IsAdminUser]
     def get(self, request):
-        configTime = AttendanceConfig.objects.order_by("-created_at").first()
+        # Cấu hình đang có hiệu lực hôm nay (có thể đã có phiên bản mới hiệu lực từ ngày sau)
+        configTime = current_config()
         if configTime:
             serializer = AttendanceConfigSerializer(configTime)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -186,11 +231,19 @@ class AttendanceConfigView(APIView):
             return Response(serializer.data, status= status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     def put(self, request):
-        configTime = AttendanceConfig.objects.order_by("-created_at").first()
+        # Không sửa phiên bản đang dùng (sẽ đổi cách tính của những ngày đã qua): tạo phiên bản mới
+        # từ cấu hình đang có hiệu lực, áp dụng từ hôm nay hoặc từ effective_from gửi lên
+        configTime = current_config()
         if not configTime:
             return Response({"message": "Chưa có cấu hình thời gian."}, status=status.HTTP_404_NOT_FOUND)
-        serializer = AttendanceConfigSerializer(configTime, data=request.data, partial=True)
+        data = {
+            "check_in_time": configTime.check_in_time,
+            "check_out_time": configTime.check_out_time,
+            "effective_from": date.today(),
+        }
+        data.update({field: request.data[field] for field in data if field in request.data})
+        serializer = AttendanceConfigSerializer(data=data)
         if serializer.is_valid():
             serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -6,6 +6,7 @@ from rest_framework import serializers
 
 from employees.models import Department, Employee, Position
 from employees.serializers import EmployeeSerializer
+from faceRecognition.utils import enroll_employee_face, validate_face_image
 from .models import User
 from django.contrib.auth import authenticate
 from rest_framework.exceptions import AuthenticationFailed
@@ -29,6 +30,11 @@ class UserSerializer(serializers.ModelSerializer):
         password2 = attrs.get('password2', "")
         if password != password2:
             raise serializers.ValidationError("Mật Khẩu không đúng!")
+        employee_img = attrs['employee'].get('employeeImg')
+        if employee_img and not isinstance(employee_img, str):
+            error = validate_face_image(employee_img)
+            if error:
+                raise serializers.ValidationError({"employeeImg": error})
         return attrs
     
     def create(self, validated_data):
@@ -49,12 +55,13 @@ class UserSerializer(serializers.ModelSerializer):
         if isinstance(employee_img, str):  # Nếu là chuỗi (không hợp lệ)
             raise serializers.ValidationError({"employeeImg": "Định dạng hình ảnh không hợp lệ. Vui lòng tải lên tệp hình ảnh thực tế."})
 
-        Employee.objects.create(
+        employee = Employee.objects.create(
             user=user,
             department=department,
             position=position,
             employeeImg=employee_data.get('employeeImg')
         )
+        enroll_employee_face(employee)
         return user
     
 
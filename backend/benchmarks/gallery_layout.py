@@ -0,0 +1,126 @@
+"""
+So sánh độ trễ so khớp và bộ nhớ (RSS) giữa hai cách lưu gallery:
+
+- list: danh sách vector float64 + danh sách id Python, so khớp bằng
+  compare_faces/face_distance cho từng khuôn mặt (cách làm cũ)
+- packed: ma trận float32/float16 liền mạch + mảng id int64, so khớp bằng matcher.match_faces
+
+Chạy từ thư mục backend, không cần Django hay dlib:
+    python benchmarks/gallery_layout.py --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faceRecognition.matcher import match_faces, squared_norms  # noqa: E402
+
+ENCODING_SIZE = 128
+TOLERANCE = 0.5
+
+
+def rss_bytes():
+    """RSS hiện tại của process (Linux), None nếu không đọc được."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def list_match(known_encodings, known_ids, face_encodings):
+    # Tương đương face_recognition.compare_faces + face_distance trên danh sách vector
+    recognized = []
+    for face_encoding in face_encodings:
+        distances = np.linalg.norm(np.asarray(known_encodings) - face_encoding, axis=1)
+        matches = list(distances <= TOLERANCE)
+        best = int(np.argmin(distances))
+        recognized.append(known_ids[best] if matches[best] else None)
+    return recognized
+
+
+def run(layout, size, faces, repeats, seed):
+    rng = np.random.default_rng(seed)
+    source = rng.normal(0, 0.09, (size, ENCODING_SIZE))
+    queries = source[rng.choice(size, faces)] + rng.normal(0, 0.01, (faces, ENCODING_SIZE))
+    del source
+
+    tracemalloc.start()
+    rss_before = rss_bytes()
+    rng = np.random.default_rng(seed)
+    if layout == "list":
+        known_encodings = [rng.normal(0, 0.09, ENCODING_SIZE) for _ in range(size)]
+        known_ids = list(range(1, size + 1))
+
+        def match():
+            return list_match(known_encodings, known_ids, queries)
+    else:
+        dtype = np.float16 if layout == "packed16" else np.float32
+        known_encodings = np.empty((size, ENCODING_SIZE), dtype=dtype)
+        for start in range(0, size, 4096):
+            block = known_encodings[start:start + 4096]
+            block[:] = rng.normal(0, 0.09, block.shape)
+        known_ids = np.arange(1, size + 1, dtype=np.int64)
+        known_sq_norms = squared_norms(known_encodings).astype(np.float32)
+
+        def match():
+            return match_faces(queries, known_encodings, known_ids, TOLERANCE, known_sq_norms)
+    rss_after = rss_bytes()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    match()
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        match()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "layout": layout,
+        "size": size,
+        "faces": faces,
+        "match_ms_p50": float(np.percentile(timings, 50)),
+        "match_ms_p95": float(np.percentile(timings, 95)),
+        "rss_mb": (rss_after - rss_before) / 2**20 if rss_before is not None else None,
+        "traced_mb": traced_peak / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--layouts", nargs="+", default=["list", "packed", "packed16"])
+    parser.add_argument("--faces", type=int, default=1, help="số khuôn mặt trong mỗi ảnh")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    # Mỗi phép đo chạy trong process riêng để RSS không bị ảnh hưởng bởi lần đo trước
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for size in args.sizes:
+        for layout in args.layouts:
+            with context.Pool(1) as pool:
+                result = pool.apply(run, (layout, size, args.faces, args.repeats, args.seed))
+            results.append(result)
+            rss = f"{result['rss_mb']:8.1f}" if result["rss_mb"] is not None else "     n/a"
+            print(
+                f"{layout:>9} N={size:>7}  p50={result['match_ms_p50']:8.2f} ms  "
+                f"p95={result['match_ms_p95']:8.2f} ms  rss={rss} MB  traced={result['traced_mb']:8.1f} MB"
+            )
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Đo thời gian khởi động nguội và bộ nhớ (RSS) của một process web theo cấu hình triển khai:
+
+- web: WORKER_GROUP=web, chỉ nạp các endpoint không nhận diện (cv2 / dlib không được import)
+- recognition: WORKER_GROUP=recognition, nạp sẵn model dlib như khi bật WARMUP (warmup.warm_models)
+- eager: WORKER_GROUP=all nhưng import cv2 + face_recognition ngay khi khởi động,
+  tương đương một worker trước khi các import nặng được chuyển sang lúc dùng lần đầu
+
+Mỗi lần đo chạy một process Python mới: django.setup() rồi nạp toàn bộ URLconf
+(như request đầu tiên của worker). Báo trung vị của tổng thời gian từ lúc tạo process,
+thời gian từng bước và RSS cuối cùng; kết quả ghi ra JSON với --output.
+
+Chạy từ thư mục backend (cần settings Django nạp được, không cần kết nối DB):
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --configs web recognition --repeats 10 --output import.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("numpy", "cv2", "face_recognition", "dlib")
+
+CONFIGS = {
+    "web": {"env": {"WORKER_GROUP": "web"}, "eager": False, "models": False},
+    "recognition": {"env": {"WORKER_GROUP": "recognition"}, "eager": False, "models": True},
+    "eager": {"env": {"WORKER_GROUP": "all"}, "eager": True, "models": False},
+}
+
+# Chạy trong process con; in ra một dòng JSON
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+timings = {}
+if EAGER:
+    import cv2, face_recognition  # noqa: F401
+    timings["eager_import_ms"] = (time.perf_counter() - started) * 1000
+mark = time.perf_counter()
+import django
+django.setup()
+timings["setup_ms"] = (time.perf_counter() - mark) * 1000
+mark = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+timings["urls_ms"] = (time.perf_counter() - mark) * 1000
+if MODELS:
+    mark = time.perf_counter()
+    from faceRecognition import warmup
+    warmup.warm_models()
+    timings["models_ms"] = (time.perf_counter() - mark) * 1000
+timings["total_in_process_ms"] = (time.perf_counter() - started) * 1000
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+print(json.dumps({"timings": timings, "rss_mb": rss_mb(), "modules": [m for m in HEAVY if m in sys.modules]}))
+"""
+
+
+def run_once(name, settings_module):
+    config = CONFIGS[name]
+    code = CHILD.replace("EAGER", repr(config["eager"])).replace("MODELS", repr(config["models"]))
+    code = code.replace("HEAVY", repr(HEAVY_MODULES))
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module, **config["env"])
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get("PYTHONPATH")]))
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"{name}: process con lỗi\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["wall_ms"] = wall_ms
+    return result
+
+
+def summarize(name, runs):
+    timings = {key: statistics.median(run["timings"][key] for run in runs) for key in runs[0]["timings"]}
+    return {
+        "config": name,
+        "n": len(runs),
+        "wall_ms": statistics.median(run["wall_ms"] for run in runs),
+        "rss_mb": statistics.median(run["rss_mb"] for run in runs),
+        "timings_ms": timings,
+        "modules": runs[-1]["modules"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--settings", default=os.environ.get("DJANGO_SETTINGS_MODULE", "facetechs.settings"), help="module settings Django"
+    )
+    parser.add_argument("--output", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.configs:
+        result = summarize(name, [run_once(name, args.settings) for _ in range(args.repeats)])
+        results.append(result)
+        steps = "  ".join(f"{key}={value:.0f}" for key, value in result["timings_ms"].items())
+        print(
+            f"{name:>12}  wall={result['wall_ms']:7.0f} ms  rss={result['rss_mb']:6.1f} MB  {steps}  "
+            f"modules={','.join(result['modules'])}"
+        )
+
+    if args.output:
+        meta = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "args": {key: value for key, value in vars(args).items() if key != "output"},
+        }
+        with open(args.output, "w") as output:
+            json.dump({"meta": meta, "results": results}, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
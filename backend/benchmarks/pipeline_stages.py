@@ -0,0 +1,308 @@
+"""
+Đo thời gian từng bước của luồng check-in:
+
+- base64: giải mã chuỗi base64 (data URL) gửi lên trong JSON
+- decode: imdecode + cvtColor (pipeline.decode_image), theo độ phân giải
+- quality: độ sáng + phương sai Laplacian (quality.frame_stats), theo độ phân giải
+- detect: phát hiện khuôn mặt (pipeline.detect_faces), theo độ phân giải
+- encode: vector 128 chiều (pipeline.encode_faces), theo số khuôn mặt trong ảnh
+- match: so khớp với gallery (index brute / ivf), theo kích thước gallery và số khuôn mặt
+- db_write: check-in vào bảng Attendance (checkin.record_attendance), chỉ khi có --db
+
+Mỗi bước báo p50 / p95 / p99 (ms) và throughput (lần/giây); kết quả ghi ra JSON
+kèm commit hiện tại để so sánh giữa các lần chạy (--compare).
+
+Ảnh: mặc định là ảnh tổng hợp (không có khuôn mặt thật nên detect thường không tìm thấy gì;
+encode vẫn được đo trên các box giả). Dùng --images <thư mục> để đo với ảnh khuôn mặt thật.
+
+Chạy từ thư mục backend:
+    python benchmarks/pipeline_stages.py --output bench.json
+    python benchmarks/pipeline_stages.py --sizes 100 1000 10000 100000 --resolutions 640x480 1920x1080
+    python benchmarks/pipeline_stages.py --db --output after.json --compare before.json
+"""
+import argparse
+import base64
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faceRecognition.index import BruteForceIndex, IVFIndex  # noqa: E402
+from faceRecognition.matcher import squared_norms  # noqa: E402
+
+ENCODING_SIZE = 128
+STAGES = ("base64", "decode", "quality", "detect", "encode", "match", "db_write")
+
+
+def measure(function, repeats, warmup=1):
+    for _ in range(warmup):
+        function()
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def summarize(stage, params, timings):
+    timings = np.asarray(timings)
+    mean = float(timings.mean())
+    return {
+        "stage": stage,
+        "params": params,
+        "n": len(timings),
+        "mean_ms": mean,
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "throughput_per_s": 1000 / mean if mean else None,
+    }
+
+
+def parse_resolution(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def synthetic_jpeg(width, height, seed):
+    """Ảnh JPEG tổng hợp (nền chuyển màu + nhiễu) có kích thước file gần với ảnh camera."""
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[..., 0] = x
+    frame[..., 1] = y
+    frame[..., 2] = (x + y) / 2
+    frame = cv2.add(frame, rng.integers(0, 32, frame.shape, dtype=np.uint8))
+    ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return buffer.tobytes()
+
+
+def load_images(directory, resolutions, seed):
+    """Danh sách (tên, bytes JPEG/PNG): ảnh trong --images hoặc ảnh tổng hợp cho mỗi độ phân giải."""
+    if directory:
+        paths = sorted(
+            path for pattern in ("*.jpg", "*.jpeg", "*.png")
+            for path in glob.glob(os.path.join(directory, pattern))
+        )
+        images = []
+        for path in paths:
+            with open(path, "rb") as image_file:
+                images.append((os.path.basename(path), image_file.read()))
+        return images
+    return [(f"{width}x{height}", synthetic_jpeg(width, height, seed)) for width, height in resolutions]
+
+
+def synthetic_boxes(frame, faces):
+    # Box giả dàn đều theo chiều ngang, mỗi box rộng ~1/(2*faces) ảnh
+    height, width = frame.shape[:2]
+    size = max(40, min(height // 2, width // (2 * faces)))
+    top = (height - size) // 2
+    step = width // faces
+    return [(top, left + size, top + size, left) for left in (step * i + (step - size) // 2 for i in range(faces))]
+
+
+def bench_images(args, results):
+    try:
+        import cv2  # noqa: F401
+        # pipeline chỉ import face_recognition khi detect / encode lần đầu: kiểm tra trước ở đây
+        import face_recognition  # noqa: F401
+        from faceRecognition import pipeline, quality
+    except ImportError as e:
+        print(f"bỏ qua decode / detect / encode: {e}")
+        return
+
+    images = load_images(args.images, args.resolutions, args.seed)
+    if not images:
+        print(f"không tìm thấy ảnh trong {args.images}")
+        return
+    options = pipeline.DetectionOptions(args.detection_max_width or None, args.upsample, args.model, max(args.faces))
+    for name, data in images:
+        start = len(results)
+        encoded = "data:image/jpeg;base64," + base64.b64encode(data).decode()
+        frame = pipeline.decode_image(data)
+        params = {"image": name, "width": frame.shape[1], "height": frame.shape[0], "bytes": len(data)}
+
+        if "base64" in args.stages:
+            results.append(summarize("base64", params, measure(
+                lambda: base64.b64decode(encoded.split(",")[1]), args.repeats
+            )))
+        if "decode" in args.stages:
+            results.append(summarize("decode", params, measure(
+                lambda: pipeline.decode_image(data, max_width=args.decode_max_width), args.repeats
+            )))
+        if "quality" in args.stages:
+            results.append(summarize("quality", params, measure(lambda: quality.frame_stats(frame), args.repeats)))
+        if "detect" in args.stages:
+            detected = pipeline.detect_faces(frame, options)
+            results.append(summarize("detect", dict(params, found=len(detected), **options._asdict()), measure(
+                lambda: pipeline.detect_faces(frame, options), args.slow_repeats
+            )))
+        if "encode" in args.stages:
+            for faces in args.faces:
+                boxes = synthetic_boxes(frame, faces)
+                results.append(summarize("encode", dict(params, faces=faces), measure(
+                    lambda: pipeline.encode_faces(frame, boxes), args.slow_repeats
+                )))
+        print_results(results[start:])
+
+
+def bench_match(args, results):
+    rng = np.random.default_rng(args.seed)
+    for size in args.sizes:
+        encodings = np.empty((size, ENCODING_SIZE), dtype=np.float32)
+        for start in range(0, size, 4096):
+            block = encodings[start:start + 4096]
+            block[:] = rng.normal(0, 0.09, block.shape)
+        keys = np.arange(1, size + 1, dtype=np.int64)
+        sq_norms = squared_norms(encodings)
+        rows = {int(key): row for row, key in enumerate(keys)}
+        for index_name in args.indexes:
+            index = BruteForceIndex() if index_name == "brute" else IVFIndex(nprobe=args.nprobe, seed=args.seed)
+            started = time.perf_counter()
+            index.reset(keys, encodings)
+            build_ms = (time.perf_counter() - started) * 1000
+            for faces in args.faces:
+                queries = encodings[rng.choice(size, faces)] + rng.normal(0, 0.01, (faces, ENCODING_SIZE))
+                queries = queries.astype(np.float32)
+                result = summarize(
+                    "match",
+                    {"index": index_name, "gallery_size": size, "faces": faces, "build_ms": build_ms},
+                    measure(lambda: index.search(queries, encodings, sq_norms, rows, k=2), args.repeats),
+                )
+                results.append(result)
+                print_results([result])
+
+
+def bench_db(args, results):
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "facetechs.settings")
+    django.setup()
+    from django.db import transaction
+
+    from authentications.models import User
+    from employees.models import Employee
+    from faceRecognition.checkin import employee_queryset, record_attendance
+
+    class Rollback(Exception):
+        pass
+
+    # Mọi dữ liệu tạo ra đều bị rollback
+    try:
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email=f"benchmark-{os.getpid()}@example.invalid", firstName="Bench", lastName="Mark", password=None
+            )
+            employee = employee_queryset().get(id=Employee.objects.create(user=user).id)
+
+            def check_in():
+                try:
+                    with transaction.atomic():
+                        record_attendance(employee, "check_in")
+                        raise Rollback()
+                except Rollback:
+                    pass
+
+            result = summarize("db_write", {"vendor": transaction.get_connection().vendor}, measure(check_in, args.repeats))
+            results.append(result)
+            print_results([result])
+            raise Rollback()
+    except Rollback:
+        pass
+
+
+def print_results(results):
+    for result in results:
+        params = " ".join(f"{key}={value}" for key, value in result["params"].items() if key != "build_ms")
+        print(
+            f"{result['stage']:>8}  p50={result['p50_ms']:9.3f} ms  p95={result['p95_ms']:9.3f} ms  "
+            f"p99={result['p99_ms']:9.3f} ms  {result['throughput_per_s'] or 0:9.1f}/s  {params}"
+        )
+
+
+def result_key(result):
+    return result["stage"], json.dumps({k: v for k, v in result["params"].items() if k not in ("build_ms", "found")}, sort_keys=True)
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = {result_key(result): result for result in json.load(baseline_file)["results"]}
+    print(f"\nSo với {baseline_path} (p50 mới / p50 cũ):")
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old and old["p50_ms"]:
+            ratio = result["p50_ms"] / old["p50_ms"]
+            print(f"{result['stage']:>8}  {ratio:6.2f}x  {old['p50_ms']:9.3f} -> {result['p50_ms']:9.3f} ms  {result_key(result)[1]}")
+
+
+def metadata(args):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES[:-1]))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000], help="kích thước gallery")
+    parser.add_argument("--indexes", nargs="+", choices=["brute", "ivf"], default=["brute"])
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--resolutions", type=parse_resolution, nargs="+", default=["640x480", "1280x720", "1920x1080"])
+    parser.add_argument("--faces", type=int, nargs="+", default=[1, 3, 5], help="số khuôn mặt trong mỗi ảnh")
+    parser.add_argument("--images", help="thư mục ảnh khuôn mặt thật thay cho ảnh tổng hợp")
+    parser.add_argument("--decode-max-width", type=int, help="như FACE_RECOGNITION['DECODE_MAX_WIDTH']")
+    parser.add_argument("--detection-max-width", type=int, default=640)
+    parser.add_argument("--upsample", type=int, default=1)
+    parser.add_argument("--model", default="hog", choices=["hog", "cnn"])
+    parser.add_argument("--repeats", type=int, default=200, help="số lần đo cho các bước nhanh")
+    parser.add_argument("--slow-repeats", type=int, default=20, help="số lần đo cho detect / encode")
+    parser.add_argument("--db", action="store_true", help="đo cả db_write (cần DB trong settings, dữ liệu được rollback)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="ghi kết quả ra file JSON")
+    parser.add_argument("--compare", help="file JSON của lần chạy trước để so sánh")
+    args = parser.parse_args()
+    args.resolutions = [parse_resolution(value) if isinstance(value, str) else value for value in args.resolutions]
+    if args.db and "db_write" not in args.stages:
+        args.stages.append("db_write")
+
+    results = []
+    if set(args.stages) & {"base64", "decode", "quality", "detect", "encode"}:
+        bench_images(args, results)
+    if "match" in args.stages:
+        bench_match(args, results)
+    if "db_write" in args.stages:
+        bench_db(args, results)
+
+    report = {"meta": metadata(args), "results": results}
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
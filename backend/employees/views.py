@@ -2,6 +2,7 @@ from django.shortcuts import render
 
 from employees.models import Employee, Department, Position
 from employees.serializers import EmployeeSerializer
+from faceRecognition.utils import enroll_employee_face, validate_face_image
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -73,10 +74,16 @@ class EmployeeProfileWiew(APIView):
             #         position_obj, _ = Position.objects.get_or_create(name=position_name)
             #         data['position'] = position_obj.id
 
-            if request.FILES.get('employeeImg'):
+            image_uploaded = bool(request.FILES.get('employeeImg'))
+            if image_uploaded:
+                error = validate_face_image(request.FILES['employeeImg'])
+                if error:
+                    return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
                 employee.employeeImg = request.FILES['employeeImg']
 
             employee.save()
+            if image_uploaded:
+                enroll_employee_face(employee)
 
             # Phản hồi dữ liệu mới
             return Response({
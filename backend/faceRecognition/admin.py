@@ -1,3 +1,12 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Kiosk
+
+
+class KioskAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name')
+    search_fields = ('code', 'name')
+    filter_horizontal = ('departments',)
+
+
+admin.site.register(Kiosk, KioskAdmin)
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class FaceRecognitionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'face_recognition'
+    name = 'faceRecognition'
+
+    def ready(self):
+        from faceRecognition import signals  # noqa: F401
+        from faceRecognition import warmup
+
+        # Nhóm worker "web" không nhận diện nên không có gì để làm nóng
+        if warmup.serving() and settings.WORKER_GROUP != "web":
+            warmup.start()
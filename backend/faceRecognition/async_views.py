@@ -0,0 +1,229 @@
+"""
+Endpoint check-in async cho ASGI (facetechs/asgi.py).
+
+Mỗi request chỉ giữ một coroutine trong lúc chờ, nên một process ASGI giữ được hàng trăm
+kết nối kiosk cùng lúc. Phần nhận diện (giải mã, phát hiện, encode, so khớp) chạy trong
+thread pool riêng và tối đa ASYNC_MAX_CONCURRENCY request được xử lý đồng thời; các request
+khác xếp hàng chờ, quá ASYNC_MAX_QUEUE request chờ hoặc chờ quá ASYNC_QUEUE_TIMEOUT giây thì trả 503.
+"""
+import asyncio
+import base64
+import contextvars
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from employees.models import Employee
+from facetechs import metrics
+from faceRecognition.checkin import arecord_attendance, employee_queryset
+from faceRecognition.conf import get_setting
+from faceRecognition.gallery import get_kiosk_gallery
+from faceRecognition.pipeline import detection_options
+from faceRecognition.recognition import detection_overrides, kiosk_key, read_image, recognize, remember
+
+logger = logging.getLogger(__name__)
+
+
+class ServerBusy(Exception):
+    pass
+
+
+class ConcurrencyLimiter:
+    """Giới hạn số request xử lý đồng thời, các request còn lại xếp hàng có giới hạn."""
+
+    def __init__(self, limit, max_waiting, timeout):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self._waiting = 0
+
+    @property
+    def waiting(self):
+        return self._waiting
+
+    async def __aenter__(self):
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return self
+        if self._waiting >= self.max_waiting:
+            metrics.count_result("busy")
+            raise ServerBusy()
+        self._waiting += 1
+        try:
+            with metrics.stage("queue"):
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            metrics.count_result("busy")
+            raise ServerBusy()
+        finally:
+            self._waiting -= 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
+
+
+_limiter = None
+_cpu_executor = None
+_init_lock = threading.Lock()
+
+
+def get_limiter():
+    global _limiter
+    with _init_lock:
+        if _limiter is None:
+            _limiter = ConcurrencyLimiter(
+                get_setting("ASYNC_MAX_CONCURRENCY"),
+                get_setting("ASYNC_MAX_QUEUE"),
+                get_setting("ASYNC_QUEUE_TIMEOUT"),
+            )
+        return _limiter
+
+
+def get_cpu_executor():
+    # Một thread cho mỗi request đang xử lý; khi bật RECOGNITION_WORKERS thread chỉ chờ pool process
+    global _cpu_executor
+    with _init_lock:
+        if _cpu_executor is None:
+            _cpu_executor = ThreadPoolExecutor(
+                max_workers=get_setting("ASYNC_MAX_CONCURRENCY"), thread_name_prefix="face-recognition"
+            )
+        return _cpu_executor
+
+
+async def acheck_in(image_data, options, action, kiosk, tracker=None, kiosk_id=None):
+    """
+    Nhận diện rồi check-in/out, dùng chung cho check_in_async và phiên kiosk streaming
+    (kiosk, tracker: xem recognition.recognize; kiosk_id: mã kiosk để chọn phân vùng gallery).
+    Trả về (payload, status); ném ServerBusy nếu hàng đợi đầy.
+    """
+    cache_scope = (kiosk, action)
+    async with get_limiter():
+        gallery, partition = await sync_to_async(get_kiosk_gallery)(kiosk_id)
+        loop = asyncio.get_running_loop()
+        # run_in_executor không tự chuyển contextvars: chạy trong bản sao context để metrics
+        # ghi được thời gian các bước vào Server-Timing của request
+        recognition = await loop.run_in_executor(
+            get_cpu_executor(),
+            contextvars.copy_context().run,
+            recognize,
+            image_data,
+            options,
+            gallery,
+            tracker,
+            cache_scope,
+            partition,
+        )
+    if recognition.response:
+        return recognition.response
+
+    # Xử lý sau nhận diện: truy vấn ORM async, không chiếm thread trong lúc chờ DB
+    with metrics.stage("attendance"):
+        try:
+            employee = await employee_queryset().aget(id=recognition.employee_id)
+        except Employee.DoesNotExist:
+            return {"status": "error", "message": "Không tìm thấy nhân viên trong hệ thống"}, 200
+        payload, status = await arecord_attendance(employee, action)
+    remember(cache_scope, employee.id, recognition.face_hash, payload, status)
+    return payload, status
+
+
+async def authenticate_admin(request):
+    """Xác thực JWT như FaceRecognitionView (IsAdminUser). Trả về JsonResponse lỗi hoặc None."""
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed as e:
+        return JsonResponse({"detail": str(e.detail)}, status=401)
+    if result is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    user, _ = result
+    if not user.is_staff:
+        return JsonResponse({"detail": "You do not have permission to perform this action."}, status=403)
+    request.user = user
+    return None
+
+
+def parse_body(request):
+    """Trả về (ảnh, dict tham số) từ body JSON, body image/* hoặc multipart/form."""
+    content_type = request.content_type or ""
+    if content_type.startswith("image/"):
+        return request.body, request.GET
+    if content_type == "application/json":
+        data = json.loads(request.body or b"{}")
+        if not isinstance(data, dict):
+            raise ValueError("Body JSON phải là object")
+        return data.get("image"), data
+    params = request.POST.copy()
+    params.update(request.GET)
+    return request.FILES.get("image") or request.POST.get("image"), params
+
+
+def option_value(params, name):
+    value = params.get(name)
+    return value if isinstance(value, (str, int)) else None
+
+
+async def check_in_async(request):
+    metrics.count_request("check_in_async")
+    if request.method != "POST":
+        return JsonResponse({"status": "error", "message": "Chỉ chấp nhận POST request"}, status=405)
+    denied = await authenticate_admin(request)
+    if denied:
+        return denied
+
+    try:
+        image, params = parse_body(request)
+    except ValueError:
+        return JsonResponse({"status": "error", "message": "Dữ liệu gửi lên không hợp lệ"}, status=400)
+    if not image:
+        return JsonResponse({"status": "error", "message": "Không có dữ liệu hình ảnh"})
+
+    try:
+        image_data = read_image(image)
+    except (base64.binascii.Error, ValueError) as DecodingError:
+        return JsonResponse(
+            {
+                "status": "error",
+                "message": "Ảnh không hợp lệ hoặc không thể giải mã",
+                "debug": str(DecodingError),
+            },
+            status=400,
+        )
+
+    try:
+        options = detection_options(detection_overrides(lambda field: option_value(params, field)))
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+    kiosk_id = option_value(params, "kiosk_id")
+    try:
+        payload, status = await acheck_in(
+            image_data,
+            options,
+            option_value(params, "action") or "",
+            kiosk_key(request.user, kiosk_id),
+            kiosk_id=kiosk_id,
+        )
+    except ServerBusy:
+        response = JsonResponse(
+            {"status": "error", "message": "Hệ thống đang quá tải, vui lòng thử lại"}, status=503
+        )
+        response["Retry-After"] = "1"
+        return response
+    except Exception as e:
+        metrics.count_result("error")
+        logger.error(f"Lỗi trong quá trình nhận diện: {str(e)}", exc_info=True)
+        return JsonResponse({"status": "error", "message": f"Có lỗi xảy ra: {str(e)}"}, status=500)
+    return JsonResponse(payload, status=status)
+
+
+# Xác thực bằng JWT nên không cần CSRF; không dùng decorator csrf_exempt vì ở Django 4.2
+# nó bọc view async thành view sync
+check_in_async.csrf_exempt = True
@@ -0,0 +1,104 @@
+"""
+Cache ngắn hạn kết quả check-in/out theo (kiosk, nhân viên, action).
+
+Khi nhân viên đứng trước kiosk, frontend gửi liên tục các frame gần như giống nhau.
+Mỗi kết quả nhận diện thành công được lưu kèm perceptual hash của khuôn mặt
+(pipeline.face_hash); frame sau tại cùng kiosk / action, đã được nhận diện là cùng nhân viên
+và có khuôn mặt với hash gần (khoảng cách Hamming <= RESULT_CACHE_HASH_DISTANCE), trả lại
+kết quả cũ mà không check-in lại hay truy vấn DB. Hash chỉ dùng sau khi đã biết danh tính:
+hash của hai người khác nhau có thể gần nhau. Mỗi mục hết hạn sau RESULT_CACHE_TTL giây; khi đầy, mục cũ nhất bị bỏ.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from faceRecognition.conf import get_setting
+
+
+def hamming(hash_a, hash_b):
+    # int.bit_count() chỉ có từ Python 3.10
+    return bin(hash_a ^ hash_b).count("1")
+
+
+class ResultCache:
+    def __init__(self, ttl, max_entries, max_distance):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        # (kiosk, employee_id, action) -> (hết hạn lúc, hash, payload, status), theo thứ tự thêm vào
+        self._entries = OrderedDict()
+        self._by_kiosk = {}  # (kiosk, action) -> {khoá trong _entries}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, kiosk, action, face_hash, employee_id):
+        """Kết quả (payload, status) của nhân viên employee_id có hash gần nhất với face_hash, hoặc None."""
+        with self._lock:
+            self._purge()
+            best, best_distance = None, self.max_distance + 1
+            for key in self._by_kiosk.get((kiosk, action), ()):
+                if key[1] != employee_id:
+                    continue
+                _, stored_hash, payload, status = self._entries[key]
+                distance = hamming(face_hash, stored_hash)
+                if distance < best_distance:
+                    best, best_distance = (payload, status), distance
+            return best
+
+    def put(self, kiosk, employee_id, action, face_hash, payload, status):
+        key = (kiosk, employee_id, action)
+        with self._lock:
+            # Kết quả của action khác (check-in rồi check-out) không còn đúng với trạng thái chấm công mới
+            stale = [
+                other for (other_kiosk, _), keys in self._by_kiosk.items() if other_kiosk == kiosk
+                for other in keys if other[1] == employee_id
+            ]
+            for other in stale:
+                self._remove(other)
+            self._entries[key] = (time.monotonic() + self.ttl, face_hash, payload, status)
+            self._by_kiosk.setdefault((kiosk, action), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_kiosk.clear()
+
+    def _purge(self):
+        # TTL cố định và mục được thêm lại thì chuyển xuống cuối nên thứ tự thêm cũng là thứ tự hết hạn
+        now = time.monotonic()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[0] > now:
+                break
+            self._remove(key)
+
+    def _remove(self, key):
+        del self._entries[key]
+        kiosk, _, action = key
+        keys = self._by_kiosk.get((kiosk, action))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_kiosk[(kiosk, action)]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Cache dùng chung trong process, hoặc None nếu RESULT_CACHE_TTL = 0."""
+    global _cache
+    ttl = get_setting("RESULT_CACHE_TTL")
+    if not ttl:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(
+                ttl, get_setting("RESULT_CACHE_MAX_ENTRIES"), get_setting("RESULT_CACHE_HASH_DISTANCE")
+            )
+        return _cache
@@ -0,0 +1,175 @@
+"""
+Quy tắc check-in / check-out sau khi đã nhận diện được nhân viên.
+
+Dùng chung cho view đồng bộ (FaceRecognitionView), view async và phiên kiosk streaming:
+prepare_attendance quyết định kết quả và bản ghi cần lưu, build_response tạo nội dung phản hồi
+sau khi lưu (trạng thái Present/Late được tính trong Attendance.save).
+
+record_attendance ghi nhận trong một transaction: check-in lần đầu trong ngày chỉ là một câu
+INSERT (ràng buộc unique (employeeId, date) chặn bản ghi trùng khi hai kiosk check-in cùng lúc),
+các trường hợp còn lại khoá bản ghi hôm nay bằng SELECT ... FOR UPDATE rồi mới cập nhật.
+"""
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+
+from attendance.models import Attendance
+from employees.models import Employee
+
+ACTIONS = ("check_in", "check_out")
+
+CHECKED_IN = "checked_in"
+ALREADY_CHECKED_IN = "already_checked_in"
+ABSENT_CHECK_IN = "absent_check_in"
+NOT_CHECKED_IN = "not_checked_in"
+ABSENT_CHECK_OUT = "absent_check_out"
+CHECKED_OUT = "checked_out"
+ALREADY_CHECKED_OUT = "already_checked_out"
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def employee_queryset():
+    return Employee.objects.select_related("user", "department", "position")
+
+
+def employee_info(employee):
+    return {
+        "employeeId": employee.id,
+        "employee_name": employee.full_name(),
+        "department": employee.department.name if employee.department else None,
+        "position": employee.position.name if employee.position else None,
+        "employee_code": employee.employee_code,
+    }
+
+
+def validate_request(employee, action):
+    """Trả về (payload, status) nếu không được phép check-in/out, ngược lại None."""
+    if employee.status != "Active":
+        return {
+            "status": "error",
+            "message": f"{employee.full_name()} đã nghĩ việc nên không được phép check_in/out",
+        }, 200
+    if action not in ACTIONS:
+        return {
+            "status": "error",
+            "message": "Trường 'action' bắt buộc và chỉ chấp nhận 'check_in' hoặc 'check_out'",
+        }, 400
+    return None
+
+
+def prepare_attendance(attendance, employee_id, action, current_time):
+    """
+    Quyết định kết quả check-in/out dựa trên bản ghi chấm công hôm nay (có thể None).
+    Trả về (kết quả, bản ghi cần lưu hoặc None).
+    """
+    if action == "check_in":
+        if not attendance:
+            return CHECKED_IN, Attendance(
+                employeeId_id=employee_id, date=current_time.date(), check_in=current_time
+            )
+        if attendance.status == "Absent":
+            return ABSENT_CHECK_IN, None
+        if not attendance.check_in:
+            attendance.check_in = current_time
+            return CHECKED_IN, attendance
+        return ALREADY_CHECKED_IN, None
+
+    if not attendance:
+        return NOT_CHECKED_IN, None
+    if attendance.status == "Absent":
+        return ABSENT_CHECK_OUT, None
+    if not attendance.check_out:
+        attendance.check_out = current_time
+        return CHECKED_OUT, attendance
+    return ALREADY_CHECKED_OUT, None
+
+
+def build_response(result, employee, attendance):
+    """Trả về (payload, status) cho kết quả của prepare_attendance."""
+    name = employee.full_name()
+    if result == CHECKED_IN:
+        return {
+            "status": "success",
+            "action": "check_in",
+            "message": f"{name} đã check-in thành công lúc {attendance.check_in.strftime('%H:%M:%S')}",
+            "employee": employee_info(employee),
+            "attendance": {
+                "check_in": attendance.check_in.strftime(DATETIME_FORMAT),
+                "status": attendance.status,
+            },
+        }, 200
+    if result == CHECKED_OUT:
+        return {
+            "status": "success",
+            "action": "check_out",
+            "message": f"{name} đã check-out thành công lúc {attendance.check_out.strftime('%H:%M:%S')}",
+            "employee": employee_info(employee),
+            "attendance": {
+                "check_out": attendance.check_out.strftime(DATETIME_FORMAT),
+            },
+        }, 200
+    if result in (ALREADY_CHECKED_IN, ALREADY_CHECKED_OUT):
+        message = "đã check-in hôm nay." if result == ALREADY_CHECKED_IN else "đã check out hôm nay."
+        return {
+            "status": "warning",
+            "message": f"{name} {message}",
+            "employee": employee_info(employee),
+            "attendance": {
+                "check_in": attendance.check_in.strftime(DATETIME_FORMAT) if attendance.check_in else None,
+                "check_out": attendance.check_out.strftime(DATETIME_FORMAT) if attendance.check_out else None,
+                "status": attendance.status,
+            },
+        }, 200
+    messages = {
+        ABSENT_CHECK_IN: f"{name} đã bị đánh dấu vắng mặt, không thể check-in.",
+        ABSENT_CHECK_OUT: f"{name} đã bị đánh dấu vắng mặt, không thể check-out.",
+        NOT_CHECKED_IN: f"{name} chưa check-in hôm nay nên không thể check-out",
+    }
+    return {"status": "error", "message": messages[result]}, 200
+
+
+# Các trường có thể thay đổi khi cập nhật bản ghi đã có (updated_at không tự cập nhật khi dùng update_fields)
+UPDATE_FIELDS = ["check_in", "check_out", "status", "working_hours", "updated_at"]
+
+
+def insert_attendance(attendance):
+    """INSERT bản ghi check-in đầu tiên trong ngày; False nếu đã có bản ghi hôm nay."""
+    try:
+        # Trong một transaction khác thì đây là savepoint: lỗi trùng khoá không làm hỏng transaction đó
+        with transaction.atomic():
+            attendance.save(force_insert=True)
+    except IntegrityError:
+        return False
+    return True
+
+
+def record_attendance(employee, action):
+    """Check-in/out cho nhân viên đã nhận diện. Trả về (payload, status)."""
+    invalid = validate_request(employee, action)
+    if invalid:
+        return invalid
+    current_time = now()
+    if action == "check_in":
+        attendance = Attendance(employeeId_id=employee.id, date=current_time.date(), check_in=current_time)
+        if insert_attendance(attendance):
+            return build_response(CHECKED_IN, employee, attendance)
+    with transaction.atomic():
+        attendance = (
+            Attendance.objects.select_for_update()
+            .filter(employeeId_id=employee.id, date=current_time.date())
+            .first()
+        )
+        result, to_save = prepare_attendance(attendance, employee.id, action, current_time)
+        if to_save is not None:
+            if to_save.pk is None:
+                to_save.save(force_insert=True)
+            else:
+                to_save.save(update_fields=UPDATE_FIELDS)
+            attendance = to_save
+    return build_response(result, employee, attendance)
+
+
+async def arecord_attendance(employee, action):
+    """Phiên bản async của record_attendance (transaction và SELECT ... FOR UPDATE chỉ chạy được ở code đồng bộ)."""
+    return await sync_to_async(record_attendance)(employee, action)
@@ -0,0 +1,60 @@
+from django.conf import settings
+
+# Giá trị mặc định, có thể ghi đè bằng dict FACE_RECOGNITION trong settings.py
+DEFAULTS = {
+    "TOLERANCE": 0.5,
+    # Số ảnh đăng ký tối đa của một nhân viên (ảnh chính + ảnh bổ sung), cũng là số dòng tối đa trong gallery
+    "MAX_FACE_IMAGES": 5,
+    # So khớp khi nhân viên có nhiều ảnh: "min" (ảnh gần nhất), "centroid" (vector trung bình), "vote"
+    "MATCH_STRATEGY": "min",
+    "MATCH_VOTE_K": 5,  # số dòng gần nhất được bỏ phiếu khi MATCH_STRATEGY = "vote"
+    # Giây giữ phân vùng gallery của một kiosk trước khi đọc lại phân công phòng ban (xem models.Kiosk)
+    "PARTITION_REFRESH": 60,
+    # Kiểu dữ liệu của ma trận gallery: "float32" hoặc "float16" (tiết kiệm bộ nhớ, chậm hơn khi so khớp)
+    "GALLERY_DTYPE": "float32",
+    # Giải mã JPEG ở độ phân giải giảm 2/4/8 lần khi ảnh rộng hơn giá trị này, None = giải mã đầy đủ
+    "DECODE_MAX_WIDTH": None,
+    # Phát hiện khuôn mặt (có thể ghi đè theo từng request, xem pipeline.detection_options)
+    "DETECTION_MAX_WIDTH": 640,  # thu nhỏ ảnh về chiều rộng này trước khi phát hiện, None = giữ nguyên
+    "DETECTION_UPSAMPLE": 1,
+    "DETECTION_MODEL": "hog",
+    "MAX_FACES": 5,
+    # Làm nóng model + gallery khi khởi động: None (tắt), "background" hoặc "preload" (xem warmup.py)
+    "WARMUP": None,
+    # Số process nhận diện (xem executor.py), 0 = xử lý ngay trong request
+    "RECOGNITION_WORKERS": 0,
+    "RECOGNITION_TIMEOUT": 10,  # giây chờ kết quả từ process nhận diện
+    # "brute": so khớp chính xác với toàn bộ gallery, "ivf": chỉ mục xấp xỉ cho gallery lớn
+    "INDEX": "brute",
+    "IVF_NLIST": None,  # số cụm, None = tự chọn theo kích thước gallery (~sqrt(N))
+    "IVF_NPROBE": 8,  # số cụm được duyệt khi tìm kiếm: tăng để tăng recall, giảm để nhanh hơn
+    "IVF_MIN_SIZE": 2000,  # gallery nhỏ hơn ngưỡng này vẫn so khớp toàn bộ
+    # Dùng chung gallery giữa các worker qua file memory-mapped (xem shared.py)
+    "SHARED_GALLERY": False,
+    "GALLERY_DIR": None,  # None = MEDIA_ROOT/face_gallery
+    # Endpoint check_in_async (xem async_views.py)
+    "ASYNC_MAX_CONCURRENCY": 4,  # số request được nhận diện đồng thời trong một process ASGI
+    "ASYNC_MAX_QUEUE": 200,  # số request tối đa được xếp hàng chờ, vượt quá trả 503
+    "ASYNC_QUEUE_TIMEOUT": 30,  # giây chờ tối đa trong hàng đợi trước khi trả 503
+    # Loại sớm frame kém chất lượng trước khi phát hiện / encode (xem quality.py)
+    "QUALITY_GATE": True,
+    "QUALITY_MIN_BRIGHTNESS": 40,  # độ sáng trung bình (0-255) của ảnh xám
+    "QUALITY_MAX_BRIGHTNESS": 220,
+    "QUALITY_MIN_SHARPNESS": 30,  # phương sai Laplacian trên ảnh rộng 320 điểm ảnh, 0 = không kiểm tra
+    "MIN_FACE_SIZE": 60,  # cạnh nhỏ nhất (điểm ảnh, trên ảnh đã giải mã) của khuôn mặt được encode, 0 = không kiểm tra
+    # Theo dõi khuôn mặt qua các frame của phiên kiosk streaming (xem tracking.py)
+    "TRACKING": True,
+    "TRACK_IOU_THRESHOLD": 0.4,  # IoU tối thiểu để xem hai box ở hai frame là cùng một khuôn mặt
+    "TRACK_CONFIRM_HITS": 2,  # số lần encode liên tiếp cùng kết quả trước khi dùng lại danh tính
+    "TRACK_REFRESH_FRAMES": 30,  # encode lại sau chừng này frame dùng lại danh tính
+    "TRACK_MAX_MISSES": 5,  # bỏ track sau chừng này frame liên tiếp không thấy khuôn mặt
+    "TRACK_MAX_IDLE": 2.0,  # giây không có frame nào thì bỏ toàn bộ track
+    # Cache kết quả check-in/out theo kiosk (xem cache.py)
+    "RESULT_CACHE_TTL": 10,  # giây, 0 = tắt cache
+    "RESULT_CACHE_MAX_ENTRIES": 1024,
+    "RESULT_CACHE_HASH_DISTANCE": 10,  # số bit khác nhau tối đa (trên 64) giữa hai hash khuôn mặt
+}
+
+
+def get_setting(name):
+    return getattr(settings, "FACE_RECOGNITION", {}).get(name, DEFAULTS[name])
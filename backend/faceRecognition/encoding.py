@@ -0,0 +1,55 @@
+"""
+Các hàm encode ảnh khuôn mặt không phụ thuộc Django, dùng được trong process con
+(xem management command enroll_faces).
+"""
+import hashlib
+
+import numpy as np
+
+NO_FACE = "no_face"
+MULTIPLE_FACES = "multiple_faces"
+
+
+def image_checksum(image_path):
+    sha256 = hashlib.sha256()
+    with open(image_path, "rb") as image_file:
+        for chunk in iter(lambda: image_file.read(64 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def encode_image(image_path):
+    """
+    Encode ảnh đăng ký của một nhân viên.
+    Trả về (vector float32, None) hoặc (None, NO_FACE / MULTIPLE_FACES):
+    ảnh đăng ký phải có đúng một khuôn mặt để không lưu nhầm người khác.
+    """
+    import face_recognition
+
+    image = face_recognition.load_image_file(image_path)
+    face_locations = face_recognition.face_locations(image)
+    if not face_locations:
+        return None, NO_FACE
+    if len(face_locations) > 1:
+        return None, MULTIPLE_FACES
+    encodings = face_recognition.face_encodings(image, face_locations)
+    return np.asarray(encodings[0], dtype=np.float32), None
+
+
+def face_image_error(image):
+    """
+    Kiểm tra ảnh đăng ký trước khi lưu: NO_FACE / MULTIPLE_FACES, hoặc None nếu có đúng một khuôn mặt.
+    image: đường dẫn hoặc file tải lên; chỉ phát hiện khuôn mặt, không encode.
+    """
+    import face_recognition
+
+    image_array = face_recognition.load_image_file(image)
+    if hasattr(image, "seek"):
+        # File tải lên còn được lưu lại sau khi kiểm tra
+        image.seek(0)
+    face_count = len(face_recognition.face_locations(image_array))
+    if not face_count:
+        return NO_FACE
+    if face_count > 1:
+        return MULTIPLE_FACES
+    return None
@@ -0,0 +1,146 @@
+"""
+Chạy phát hiện + encode khuôn mặt trong một pool process riêng.
+
+Mỗi process con nạp model dlib một lần (lúc import face_recognition) và nhận ảnh
+đã giải mã qua shared memory, nên request Django chỉ phải chép ảnh một lần rồi chờ kết quả.
+Bật bằng FACE_RECOGNITION['RECOGNITION_WORKERS'] > 0; mặc định (0) xử lý ngay trong request.
+Pool được tạo riêng cho mỗi process web: nên chạy ít process web với nhiều thread
+(ví dụ gunicorn --workers 1 --threads 16) để số process nhận diện bằng số nhân CPU.
+"""
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from facetechs import metrics
+from faceRecognition.conf import get_setting
+from faceRecognition.quality import LowQuality
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker():
+    # face_recognition nạp các model dlib khi import: làm một lần cho mỗi process con
+    import face_recognition  # noqa: F401
+
+
+def _ping():
+    return None
+
+
+def _detect_and_encode_shared(shm_name, shape, dtype, options, reuse):
+    """
+    Chạy trong process con: đọc ảnh từ shared memory, trả về (vị trí, encodings float32,
+    thời gian từng bước để process web ghi vào metrics).
+    Frame bị loại (LowQuality) được trả về ở vị trí đầu thay vì ném, để vẫn giữ được thời gian detect.
+    """
+    from faceRecognition.pipeline import detect_and_encode
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        rgb_frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        with metrics.collect() as timings:
+            try:
+                face_locations, face_encodings = detect_and_encode(rgb_frame, options, reuse)
+            except LowQuality as rejected:
+                face_locations, face_encodings = rejected, None
+        del rgb_frame
+    finally:
+        shm.close()
+    if isinstance(face_locations, LowQuality):
+        return face_locations, None, timings
+    if reuse:
+        return face_locations, [
+            None if encoding is None else np.asarray(encoding, dtype=np.float32) for encoding in face_encodings
+        ], timings
+    return face_locations, np.asarray(face_encodings, dtype=np.float32).reshape(-1, 128), timings
+
+
+class RecognitionExecutor:
+    def __init__(self, workers, timeout=None):
+        self.workers = workers
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+            return self._pool
+
+    def _reset_pool(self, broken_pool):
+        with self._lock:
+            if self._pool is broken_pool:
+                self._pool = None
+        broken_pool.shutdown(wait=False, cancel_futures=True)
+
+    def detect_and_encode(self, rgb_frame, options, reuse=None):
+        shm = shared_memory.SharedMemory(create=True, size=max(1, rgb_frame.nbytes))
+        try:
+            np.ndarray(rgb_frame.shape, dtype=rgb_frame.dtype, buffer=shm.buf)[...] = rgb_frame
+            pool = self._get_pool()
+            try:
+                future = pool.submit(
+                    _detect_and_encode_shared,
+                    shm.name,
+                    rgb_frame.shape,
+                    rgb_frame.dtype.str,
+                    options,
+                    reuse,
+                )
+                face_locations, face_encodings, timings = future.result(timeout=self.timeout)
+                for name, seconds in timings:
+                    metrics.record(name, seconds)
+                if isinstance(face_locations, LowQuality):
+                    raise face_locations
+                return face_locations, face_encodings
+            except BrokenProcessPool:
+                # Process con bị kill (hết RAM, ...): tạo pool mới cho các request sau
+                logger.error("Pool nhận diện bị lỗi, khởi tạo lại")
+                self._reset_pool(pool)
+                raise
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def warm_up(self):
+        """Khởi động đủ process con (mỗi process nạp model một lần) trước request đầu tiên."""
+        pool = self._get_pool()
+        for future in [pool.submit(_ping) for _ in range(self.workers)]:
+            future.result(timeout=self.timeout)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Executor dùng chung trong process, hoặc None nếu xử lý trực tiếp trong request."""
+    global _executor
+    workers = get_setting("RECOGNITION_WORKERS")
+    if not workers:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = RecognitionExecutor(workers, timeout=get_setting("RECOGNITION_TIMEOUT"))
+        return _executor
+
+
+def detect_and_encode(rgb_frame, options, reuse=None):
+    """Phát hiện + encode khuôn mặt, qua pool process nếu được bật (xem pipeline.detect_and_encode)."""
+    executor = get_executor()
+    if executor is None:
+        from faceRecognition.pipeline import detect_and_encode as detect_and_encode_inline
+
+        return detect_and_encode_inline(rgb_frame, options, reuse)
+    return executor.detect_and_encode(rgb_frame, options, reuse)
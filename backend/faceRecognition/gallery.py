@@ -0,0 +1,383 @@
+import logging
+import threading
+import time
+
+import numpy as np
+from django.db.models import Max
+
+from employees.models import Employee
+from facetechs import metrics
+from faceRecognition import shared
+from faceRecognition.conf import get_setting
+from faceRecognition.index import create_index
+from faceRecognition.matcher import (
+    CENTROID, DEFAULT_TOLERANCE, STRATEGIES, VOTE, build_results, distance_matrix, nearest_neighbours,
+)
+from faceRecognition.models import FaceEmbedding, GalleryChange, Kiosk
+
+logger = logging.getLogger(__name__)
+
+ENCODING_SIZE = 128
+MIN_CAPACITY = 16
+# Key của một dòng trong chỉ mục: employee_id * KEY_STRIDE + thứ tự ảnh của nhân viên
+KEY_STRIDE = 1024
+
+
+def row_key(employee_id, slot):
+    return employee_id * KEY_STRIDE + slot
+
+
+class FaceGallery:
+    """
+    Bộ khuôn mặt đã biết của một process, lưu dạng packed:
+    ma trận encodings float32 (hoặc float16) liền mạch, mảng bình phương chuẩn tính sẵn,
+    mảng id nhân viên int64 và dict id -> các dòng. Mỗi nhân viên chiếm một dòng cho mỗi ảnh
+    đăng ký (tối đa MAX_FACE_IMAGES), hoặc một dòng vector trung bình khi MATCH_STRATEGY = "centroid".
+    Thêm / thay / xoá một nhân viên tốn O(số ảnh của nhân viên đó).
+    Mỗi thay đổi (thêm / thay ảnh / xoá nhân viên) được ghi vào GalleryChange;
+    mỗi process chỉ áp dụng những thay đổi có id lớn hơn version hiện tại của nó.
+    Khi bật SHARED_GALLERY, ma trận được map từ file dùng chung (xem shared.py) thay vì
+    mỗi worker tự dựng từ DB.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.dtype = np.dtype(get_setting("GALLERY_DTYPE"))
+        self.strategy = get_setting("MATCH_STRATEGY")
+        if self.strategy not in STRATEGIES:
+            raise ValueError(
+                f"FACE_RECOGNITION['MATCH_STRATEGY'] không hợp lệ: {self.strategy!r} "
+                f"(chỉ chấp nhận {', '.join(STRATEGIES)})"
+            )
+        self.max_images = get_setting("MAX_FACE_IMAGES")
+        if not 1 <= self.max_images <= KEY_STRIDE:
+            raise ValueError(f"FACE_RECOGNITION['MAX_FACE_IMAGES'] phải nằm trong khoảng 1..{KEY_STRIDE}")
+        self._allocate(MIN_CAPACITY)
+        self.index = create_index()
+        self.shared = get_setting("SHARED_GALLERY")
+        self.version = 0
+        self.loaded = False
+        self._partitions = {}  # mã kiosk đã đăng ký -> (version, hết hạn lúc, GalleryPartition hoặc None)
+        self._kiosk_codes = (0.0, frozenset())  # (hết hạn lúc, mã các kiosk đã đăng ký)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def encodings(self):
+        return self._encodings[:self._count]
+
+    @property
+    def ids(self):
+        return self._ids[:self._count]
+
+    @property
+    def keys(self):
+        return self._keys[:self._count]
+
+    @metrics.stage("gallery_load")
+    def load(self):
+        """Dựng lại toàn bộ gallery: map file dùng chung nếu có, nếu không thì một lần đọc DB."""
+        with self._lock:
+            if self.shared:
+                meta = shared.read_current()
+                if meta:
+                    self._map_shared(meta)
+                    self.loaded = True
+                    if self._apply_changes():
+                        self.publish()
+                    return
+
+            version = GalleryChange.objects.aggregate(latest=Max('id'))['latest'] or 0
+            self._enroll_missing()
+            grouped = self._employee_vectors(FaceEmbedding.objects.all())
+            self._allocate(sum(len(vectors) for vectors in grouped.values()))
+            for employee_id, vectors in grouped.items():
+                self._append_employee(employee_id, vectors, index=False)
+            self.index.reset(self.keys, self.encodings)
+            self.version = version
+            self.loaded = True
+            logger.info(f"Đã nạp {self._count} khuôn mặt, version {self.version}")
+            if self.shared:
+                self.publish()
+
+    def sync(self):
+        """Áp dụng các thay đổi mà process này chưa thấy. Trả về số nhân viên được cập nhật."""
+        with self._lock:
+            if not self.loaded:
+                self.load()
+                return self._count
+            if self.shared:
+                meta = shared.read_current()
+                if meta and meta["version"] > self.version:
+                    self._map_shared(meta)
+            updated = self._apply_changes()
+            if self.shared and updated:
+                self.publish()
+            return updated
+
+    def publish(self):
+        """Ghi gallery hiện tại ra file dùng chung rồi map lại để chia sẻ trang nhớ với worker khác."""
+        with self._lock:
+            shared.write_gallery(self.version, self.encodings, self._sq_norms[:self._count], self.ids)
+            meta = shared.read_current()
+            if meta and meta["version"] >= self.version:
+                self._map_shared(meta)
+                self._apply_changes()
+
+    def snapshot(self):
+        """Trả về (ma trận encodings, danh sách id) tại version hiện tại."""
+        with self._lock:
+            return self.encodings.copy(), self.ids.tolist()
+
+    def match(self, face_encodings, tolerance=DEFAULT_TOLERANCE):
+        """So khớp tất cả khuôn mặt trong ảnh với gallery trong một lần tính, xem matcher.build_results."""
+        if len(face_encodings) == 0:
+            return []
+        with self._lock:
+            rows, distances = self.index.search(
+                face_encodings,
+                self.encodings,
+                self._sq_norms[:self._count],
+                self._key_rows,
+                k=self.search_k(),
+            )
+            return build_results(rows, distances, self._ids, tolerance, self.strategy)
+
+    def search_k(self):
+        if self.strategy == VOTE:
+            return max(2, get_setting("MATCH_VOTE_K"))
+        if self.strategy == CENTROID:
+            return 2
+        # Đủ để vượt qua mọi ảnh của nhân viên gần nhất và tính margin tới nhân viên kế tiếp
+        return self.max_images + 1
+
+    def kiosk_partition(self, kiosk_id):
+        """
+        Phân vùng gallery của kiosk (nhân viên thuộc các phòng ban gán cho kiosk), hoặc None nếu
+        kiosk không được đăng ký / không gán phòng ban nào. Kết quả được giữ tới khi gallery
+        đổi version hoặc sau PARTITION_REFRESH giây (để thấy thay đổi phân công kiosk).
+        kiosk_id do client gửi lên: mã chưa đăng ký trả về None mà không truy vấn DB hay giữ lại gì.
+        """
+        if not kiosk_id:
+            return None
+        now = time.monotonic()
+        if kiosk_id not in self._registered_kiosks(now):
+            return None
+        with self._lock:
+            version = self.version
+            cached = self._partitions.get(kiosk_id)
+            if cached is not None and cached[0] == version and cached[1] > now:
+                return cached[2]
+
+        department_ids = [
+            department_id
+            for department_id in Kiosk.objects.filter(code=kiosk_id).values_list('departments', flat=True)
+            if department_id is not None
+        ]
+        members = (
+            list(Employee.objects.filter(department_id__in=department_ids).values_list('id', flat=True))
+            if department_ids else []
+        )
+        with self._lock:
+            rows = sorted(row for employee_id in members for row in self._rows.get(employee_id, ()))
+            partition = GalleryPartition(self, rows) if rows else None
+            self._partitions[kiosk_id] = (version, now + get_setting("PARTITION_REFRESH"), partition)
+        return partition
+
+    def _registered_kiosks(self, now):
+        """Mã các kiosk đã đăng ký, nạp lại sau mỗi PARTITION_REFRESH giây."""
+        with self._lock:
+            expires, codes = self._kiosk_codes
+        if expires > now:
+            return codes
+        codes = frozenset(Kiosk.objects.values_list('code', flat=True))
+        with self._lock:
+            self._kiosk_codes = (now + get_setting("PARTITION_REFRESH"), codes)
+            # Bỏ phân vùng của các kiosk đã bị xoá
+            for kiosk_id in [kiosk_id for kiosk_id in self._partitions if kiosk_id not in codes]:
+                del self._partitions[kiosk_id]
+        return codes
+
+    def _allocate(self, size):
+        capacity = max(MIN_CAPACITY, size)
+        self._encodings = np.empty((capacity, ENCODING_SIZE), dtype=self.dtype)
+        self._sq_norms = np.empty(capacity, dtype=np.float32)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._keys = np.empty(capacity, dtype=np.int64)
+        self._rows = {}  # employee_id -> danh sách chỉ số dòng trong ma trận
+        self._key_rows = {}  # key trong chỉ mục -> chỉ số dòng
+        self._count = 0
+
+    def _grow(self):
+        capacity = max(MIN_CAPACITY, len(self._encodings) * 2)
+        encodings = np.empty((capacity, ENCODING_SIZE), dtype=self.dtype)
+        encodings[:self._count] = self.encodings
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        sq_norms[:self._count] = self._sq_norms[:self._count]
+        ids = np.empty(capacity, dtype=np.int64)
+        ids[:self._count] = self.ids
+        keys = np.empty(capacity, dtype=np.int64)
+        keys[:self._count] = self.keys
+        self._encodings, self._sq_norms, self._ids, self._keys = encodings, sq_norms, ids, keys
+
+    def _map_shared(self, meta):
+        encodings, sq_norms, ids = shared.open_gallery(meta)
+        self._encodings = encodings
+        self._sq_norms = sq_norms
+        self._ids = ids
+        self._count = meta["count"]
+        # File dùng chung chỉ lưu id: key của các dòng được đánh lại theo thứ tự xuất hiện
+        self._keys = np.empty(len(ids), dtype=np.int64)
+        self._rows, self._key_rows = {}, {}
+        for row, employee_id in enumerate(self.ids.tolist()):
+            rows = self._rows.setdefault(employee_id, [])
+            key = row_key(employee_id, len(rows))
+            rows.append(row)
+            self._keys[row] = key
+            self._key_rows[key] = row
+        self.index.reset(self.keys, self.encodings)
+        self.version = meta["version"]
+
+    def _apply_changes(self):
+        changes = list(
+            GalleryChange.objects.filter(id__gt=self.version)
+            .order_by('id')
+            .values_list('id', 'employee_id')
+        )
+        if not changes:
+            return 0
+        employee_ids = {employee_id for _, employee_id in changes}
+        grouped = self._employee_vectors(FaceEmbedding.objects.filter(employee_id__in=employee_ids))
+        for employee_id in employee_ids:
+            self._remove_employee(employee_id)
+            vectors = grouped.get(employee_id)
+            if vectors:
+                self._append_employee(employee_id, vectors)
+        if self.index.needs_retrain(self._count):
+            self.index.reset(self.keys, self.encodings)
+        self.version = changes[-1][0]
+        return len(employee_ids)
+
+    def _employee_vectors(self, embeddings):
+        """
+        Gom vector của từng nhân viên: ảnh mới nhất trước, tối đa MAX_FACE_IMAGES ảnh;
+        với CENTROID mỗi nhân viên chỉ còn một vector trung bình.
+        Nhân viên đã xoá ảnh chính không còn được nhận diện dù còn ảnh bổ sung.
+        """
+        rows = (
+            embeddings.exclude(employee__employeeImg='')
+            .exclude(employee__employeeImg__isnull=True)
+            .order_by('employee_id', '-created_at', '-id')
+            .values_list('employee_id', 'encoding')
+        )
+        grouped = {}
+        for employee_id, encoding in rows.iterator():
+            vectors = grouped.setdefault(employee_id, [])
+            if len(vectors) < self.max_images:
+                vectors.append(np.frombuffer(encoding, dtype=np.float32))
+        if self.strategy == CENTROID:
+            return {employee_id: [np.mean(vectors, axis=0)] for employee_id, vectors in grouped.items()}
+        return grouped
+
+    def _append_employee(self, employee_id, vectors, index=True):
+        rows = []
+        for slot, encoding in enumerate(vectors):
+            row = self._count
+            if row == len(self._encodings):
+                self._grow()
+            self._encodings[row] = encoding
+            stored = self._encodings[row].astype(np.float32)
+            self._sq_norms[row] = np.dot(stored, stored)
+            key = row_key(employee_id, slot)
+            self._ids[row] = employee_id
+            self._keys[row] = key
+            self._key_rows[key] = row
+            self._count += 1
+            if index:
+                self.index.add(key, self._encodings[row])
+            rows.append(row)
+        self._rows[employee_id] = rows
+
+    def _remove_employee(self, employee_id):
+        # Xoá từ dòng lớn nhất: dòng cuối được dời vào chỗ trống không bao giờ là dòng của nhân viên này
+        for row in sorted(self._rows.pop(employee_id, ()), reverse=True):
+            self._remove_row(row)
+
+    def _remove_row(self, row):
+        key = int(self._keys[row])
+        self.index.remove(key)
+        del self._key_rows[key]
+        last = self._count - 1
+        if row != last:
+            # Đưa dòng cuối vào chỗ trống để không phải dịch cả ma trận
+            self._encodings[row] = self._encodings[last]
+            self._sq_norms[row] = self._sq_norms[last]
+            self._ids[row] = self._ids[last]
+            self._keys[row] = self._keys[last]
+            self._key_rows[int(self._keys[row])] = row
+            moved_rows = self._rows[int(self._ids[row])]
+            moved_rows[moved_rows.index(last)] = row
+        self._count -= 1
+
+    def _enroll_missing(self):
+        # Nhân viên có ảnh nhưng chưa có vector (dữ liệu cũ) được encode một lần rồi lưu lại
+        from faceRecognition.utils import enroll_employee_face
+
+        missing = (
+            Employee.objects.exclude(employeeImg='')
+            .exclude(employeeImg__isnull=True)
+            .filter(face_embeddings__isnull=True)
+            .select_related('user')
+        )
+        for employee in missing:
+            enroll_employee_face(employee)
+
+
+class GalleryPartition:
+    """
+    Các dòng của gallery thuộc một nhóm nhân viên, chép thành ma trận liền mạch riêng:
+    so khớp chỉ tốn thời gian theo số dòng của phân vùng, không theo kích thước gallery.
+    """
+
+    def __init__(self, gallery, rows):
+        rows = np.asarray(rows, dtype=np.intp)
+        self.strategy = gallery.strategy
+        self.k = gallery.search_k()
+        self.encodings = gallery.encodings[rows]
+        self.sq_norms = gallery._sq_norms[rows]
+        self.ids = gallery._ids[rows]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def match(self, face_encodings, tolerance=DEFAULT_TOLERANCE):
+        if len(face_encodings) == 0:
+            return []
+        distances = distance_matrix(face_encodings, self.encodings, self.sq_norms)
+        rows, nearest_distances = nearest_neighbours(distances, self.k)
+        return build_results(rows, nearest_distances, self.ids, tolerance, self.strategy)
+
+
+def record_change(employee_id):
+    GalleryChange.objects.create(employee_id=employee_id)
+
+
+def record_changes(employee_ids):
+    # Dùng cho các thao tác bulk (bulk_create không phát signal post_save)
+    GalleryChange.objects.bulk_create([GalleryChange(employee_id=employee_id) for employee_id in employee_ids])
+
+
+gallery = FaceGallery()
+
+
+def get_gallery():
+    with metrics.stage("gallery_sync"):
+        gallery.sync()
+    return gallery
+
+
+def get_kiosk_gallery(kiosk_id=None):
+    """(gallery đã đồng bộ, phân vùng của kiosk hoặc None), xem FaceGallery.kiosk_partition."""
+    current = get_gallery()
+    return current, current.kiosk_partition(kiosk_id)
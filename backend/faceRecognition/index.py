@@ -0,0 +1,181 @@
+import logging
+
+import numpy as np
+
+from faceRecognition.conf import get_setting
+from faceRecognition.matcher import distance_matrix, nearest_neighbours
+
+logger = logging.getLogger(__name__)
+
+ENCODING_SIZE = 128
+
+
+class BruteForceIndex:
+    """So khớp chính xác: tính khoảng cách tới mọi dòng của gallery."""
+
+    def reset(self, keys, encodings):
+        pass
+
+    def add(self, key, encoding):
+        pass
+
+    def remove(self, key):
+        pass
+
+    def needs_retrain(self, size):
+        return False
+
+    def search(self, faces, encodings, sq_norms, rows, k=2):
+        distances = distance_matrix(faces, encodings, sq_norms)
+        return nearest_neighbours(distances, k)
+
+
+class _InvertedList:
+    """Một cụm của IVFIndex: các vector lưu liền nhau cùng mảng key tương ứng."""
+
+    def __init__(self, dtype):
+        self.vectors = np.empty((0, ENCODING_SIZE), dtype=dtype)
+        self.sq_norms = np.empty(0, dtype=np.float32)
+        self.keys = np.empty(0, dtype=np.int64)
+        self.size = 0
+
+    def append(self, key, encoding):
+        if self.size == len(self.keys):
+            capacity = max(8, self.size * 2)
+            self.vectors = np.resize(self.vectors, (capacity, ENCODING_SIZE))
+            self.sq_norms = np.resize(self.sq_norms, capacity)
+            self.keys = np.resize(self.keys, capacity)
+        self.vectors[self.size] = encoding
+        stored = self.vectors[self.size].astype(np.float32)
+        self.sq_norms[self.size] = np.dot(stored, stored)
+        self.keys[self.size] = key
+        self.size += 1
+        return self.size - 1
+
+    def pop(self, position):
+        """Xoá phần tử tại position bằng cách đưa phần tử cuối vào; trả về key bị dời chỗ (nếu có)."""
+        last = self.size - 1
+        moved_key = None
+        if position != last:
+            self.vectors[position] = self.vectors[last]
+            self.sq_norms[position] = self.sq_norms[last]
+            self.keys[position] = self.keys[last]
+            moved_key = int(self.keys[position])
+        self.size -= 1
+        return moved_key
+
+
+class IVFIndex:
+    """
+    Chỉ mục xấp xỉ kiểu IVF: gom các vector vào nlist cụm bằng k-means,
+    khi tìm kiếm chỉ tính khoảng cách chính xác với các vector thuộc nprobe cụm gần nhất.
+    Khoảng cách trả về luôn là khoảng cách thật nên vẫn dùng chung ngưỡng tolerance;
+    nprobe càng lớn thì recall càng cao và càng chậm.
+    Mỗi cụm giữ bản sao vector của mình để duyệt liền mạch, đổi lại tốn thêm bộ nhớ bằng gallery.
+    """
+
+    def __init__(self, nlist=None, nprobe=8, min_size=2000, iterations=10, seed=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_size = min_size
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids = None
+        self._lists = []
+        self._positions = {}  # key -> (chỉ số cụm, vị trí trong cụm)
+        self._trained_size = 0
+
+    def reset(self, keys, encodings):
+        self.centroids = None
+        self._lists = []
+        self._positions = {}
+        self._trained_size = 0
+        if len(keys) >= self.min_size:
+            self._train(keys, encodings)
+
+    def add(self, key, encoding):
+        if self.centroids is None:
+            return
+        self.remove(key)
+        cluster = int(np.argmin(distance_matrix(encoding[None, :], self.centroids)[0]))
+        self._positions[key] = (cluster, self._lists[cluster].append(key, encoding))
+
+    def remove(self, key):
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+        cluster, offset = position
+        moved_key = self._lists[cluster].pop(offset)
+        if moved_key is not None:
+            self._positions[moved_key] = (cluster, offset)
+
+    def needs_retrain(self, size):
+        # Gallery vượt ngưỡng tối thiểu hoặc tăng gấp đôi thì các cụm cũ không còn cân bằng
+        if self.centroids is None:
+            return size >= self.min_size
+        return size >= 2 * self._trained_size
+
+    def search(self, faces, encodings, sq_norms, rows, k=2):
+        if self.centroids is None:
+            return BruteForceIndex().search(faces, encodings, sq_norms, rows, k)
+
+        faces = np.ascontiguousarray(faces, dtype=encodings.dtype)
+        nprobe = min(self.nprobe, len(self.centroids))
+        centroid_distances = distance_matrix(faces, self.centroids)
+        probes = np.argpartition(centroid_distances, nprobe - 1, axis=1)[:, :nprobe]
+
+        result_rows = np.full((len(faces), k), -1, dtype=np.intp)
+        result_distances = np.full((len(faces), k), np.inf)
+        for i, face_probes in enumerate(probes):
+            lists = [self._lists[cluster] for cluster in face_probes if self._lists[cluster].size]
+            if not lists:
+                continue
+            vectors = np.concatenate([inverted.vectors[:inverted.size] for inverted in lists])
+            norms = np.concatenate([inverted.sq_norms[:inverted.size] for inverted in lists])
+            keys = np.concatenate([inverted.keys[:inverted.size] for inverted in lists])
+            distances = distance_matrix(faces[i:i + 1], vectors, norms)
+            nearest, nearest_distances = nearest_neighbours(distances, k)
+            for j, candidate in enumerate(nearest[0]):
+                if candidate >= 0:
+                    result_rows[i, j] = rows[int(keys[candidate])]
+            result_distances[i] = nearest_distances[0]
+        return result_rows, result_distances
+
+    def _train(self, keys, encodings):
+        size = len(keys)
+        nlist = self.nlist or max(1, int(np.sqrt(size)))
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(size, nlist * 64)
+        sample = encodings[rng.choice(size, sample_size, replace=False)].astype(np.float32)
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.iterations):
+            labels = np.argmin(distance_matrix(sample, centroids), axis=1)
+            counts = np.bincount(labels, minlength=nlist)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        self.centroids = centroids
+        labels = np.argmin(distance_matrix(encodings, self.centroids), axis=1)
+        self._lists = [_InvertedList(encodings.dtype) for _ in range(nlist)]
+        self._positions = {}
+        for key, encoding, cluster in zip(keys, encodings, labels):
+            key, cluster = int(key), int(cluster)
+            self._positions[key] = (cluster, self._lists[cluster].append(key, encoding))
+        self._trained_size = size
+        logger.info(f"Đã huấn luyện chỉ mục IVF: {nlist} cụm cho {size} khuôn mặt")
+
+
+def create_index():
+    backend = get_setting("INDEX")
+    if backend == "brute":
+        return BruteForceIndex()
+    if backend == "ivf":
+        return IVFIndex(
+            nlist=get_setting("IVF_NLIST"),
+            nprobe=get_setting("IVF_NPROBE"),
+            min_size=get_setting("IVF_MIN_SIZE"),
+        )
+    raise ValueError(f"FACE_RECOGNITION['INDEX'] không hợp lệ: {backend!r} (chỉ chấp nhận 'brute' hoặc 'ivf')")
@@ -0,0 +1,198 @@
+import json
+import operator
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import reduce
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from employees.models import Employee
+from faceRecognition.conf import get_setting
+from faceRecognition.encoding import encode_image, image_checksum
+from faceRecognition.gallery import record_changes
+from faceRecognition.models import FaceEmbedding, FaceImage
+
+
+def _init_worker():
+    # Import face_recognition một lần cho mỗi process con: dlib nạp các model lúc import
+    import face_recognition  # noqa: F401
+
+
+def _encode_task(employee_id, image_path, stored_checksums):
+    """Chạy trong process con: tính checksum, bỏ qua ảnh đã có vector, encode ảnh mới."""
+    result = {"employee_id": employee_id, "image": image_path, "checksum": None, "encoding": None}
+    try:
+        result["checksum"] = image_checksum(image_path)
+        if result["checksum"] in stored_checksums:
+            result["status"] = "skipped"
+            return result
+        encoding, error = encode_image(image_path)
+    except FileNotFoundError:
+        result["status"] = "missing_file"
+        return result
+    except Exception as e:
+        result["status"] = "error"
+        result["detail"] = str(e)
+        return result
+    if error:
+        result["status"] = error
+        return result
+    result["status"] = "enrolled"
+    result["encoding"] = encoding.tobytes()
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        "Encode ảnh khuôn mặt của nhân viên song song bằng nhiều process và lưu vào FaceEmbedding. "
+        "Ảnh đã có checksum trong DB được bỏ qua nên có thể chạy lại để tiếp tục sau khi bị ngắt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Số process encode")
+        parser.add_argument("--batch-size", type=int, default=200, help="Số kết quả ghi DB mỗi lần")
+        parser.add_argument("--employee", type=int, nargs="+", help="Chỉ encode các nhân viên có id này")
+        parser.add_argument(
+            "--reencode-before",
+            help=(
+                "Encode lại cả những ảnh đã có vector nếu vector được tạo trước thời điểm này "
+                "(ISO 8601, ví dụ sau khi đổi model). Chạy lại với cùng giá trị để tiếp tục."
+            ),
+        )
+        parser.add_argument("--summary", help="Ghi báo cáo JSON ra file (mặc định in ra stdout)")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        reencode_before = None
+        if options["reencode_before"]:
+            reencode_before = parse_datetime(options["reencode_before"])
+            if reencode_before is None:
+                self.stderr.write(self.style.ERROR("--reencode-before không đúng định dạng ISO 8601"))
+                return
+
+        employees = Employee.objects.exclude(employeeImg='').exclude(employeeImg__isnull=True)
+        if options["employee"]:
+            employees = employees.filter(id__in=options["employee"])
+        # Mỗi ảnh một task: ảnh chính rồi tới ảnh bổ sung mới nhất, tối đa MAX_FACE_IMAGES ảnh mỗi nhân viên
+        tasks = [
+            (employee_id, Employee.employeeImg.field.storage.path(image_name))
+            for employee_id, image_name in employees.values_list("id", "employeeImg")
+        ]
+        employee_ids = {employee_id for employee_id, _ in tasks}
+        extra_counts = {}
+        extra_images = (
+            FaceImage.objects.filter(employee_id__in=employee_ids)
+            .order_by("employee_id", "-created_at", "-id")
+            .values_list("employee_id", "image")
+        )
+        for employee_id, image_name in extra_images:
+            extra_counts[employee_id] = extra_counts.get(employee_id, 0) + 1
+            if extra_counts[employee_id] < get_setting("MAX_FACE_IMAGES"):
+                tasks.append((employee_id, FaceImage.image.field.storage.path(image_name)))
+
+        stored = FaceEmbedding.objects.filter(employee_id__in=employee_ids)
+        if reencode_before:
+            stored = stored.filter(created_at__gte=reencode_before)
+        stored_checksums = {}
+        for employee_id, checksum in stored.values_list("employee_id", "checksum"):
+            stored_checksums.setdefault(employee_id, set()).add(checksum)
+
+        summary = {"total": len(tasks), "enrolled": 0, "skipped": 0, "failed": 0, "removed": 0, "failures": []}
+        pending = []
+        # Checksum của các ảnh hiện tại theo nhân viên, để xoá vector của ảnh đã bị thay / xoá
+        current_checksums = {employee_id: set() for employee_id in employee_ids}
+        unreadable = set()
+        complete = True
+        # Không để process con kế thừa kết nối DB của process cha
+        connections.close_all()
+        executor = ProcessPoolExecutor(max_workers=max(1, options["workers"]), initializer=_init_worker)
+        try:
+            futures = [
+                executor.submit(_encode_task, employee_id, image_path, stored_checksums.get(employee_id, set()))
+                for employee_id, image_path in tasks
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                if result["checksum"]:
+                    current_checksums[result["employee_id"]].add(result["checksum"])
+                else:
+                    # Không đọc được ảnh: chưa biết checksum nên giữ nguyên vector cũ của nhân viên này
+                    unreadable.add(result["employee_id"])
+                if result["status"] == "enrolled":
+                    pending.append(result)
+                    summary["enrolled"] += 1
+                elif result["status"] == "skipped":
+                    summary["skipped"] += 1
+                else:
+                    summary["failed"] += 1
+                    summary["failures"].append({
+                        "employee_id": result["employee_id"],
+                        "image": result["image"],
+                        "reason": result["status"],
+                        "detail": result.get("detail"),
+                    })
+                if len(pending) >= options["batch_size"]:
+                    self._save(pending)
+                    pending = []
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            summary["interrupted"] = True
+            complete = False
+            self.stderr.write(self.style.WARNING("Đã dừng, chạy lại lệnh để tiếp tục từ ảnh chưa encode."))
+        finally:
+            self._save(pending)
+            executor.shutdown(wait=True, cancel_futures=True)
+        if complete:
+            summary["removed"] = self._remove_stale(
+                {employee_id: checksums for employee_id, checksums in current_checksums.items() if employee_id not in unreadable}
+            )
+
+        summary["elapsed_seconds"] = round(time.monotonic() - started, 2)
+        report = json.dumps(summary, ensure_ascii=False, indent=2)
+        if options["summary"]:
+            with open(options["summary"], "w", encoding="utf-8") as summary_file:
+                summary_file.write(report)
+        else:
+            self.stdout.write(report)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Đã encode {summary['enrolled']} ảnh, bỏ qua {summary['skipped']}, lỗi {summary['failed']}."
+            )
+        )
+
+    def _save(self, results):
+        if not results:
+            return
+        employee_ids = {result["employee_id"] for result in results}
+        with transaction.atomic():
+            # Vector cũ của cùng ảnh (khi encode lại với --reencode-before) được thay bằng vector mới
+            FaceEmbedding.objects.filter(
+                reduce(operator.or_, (Q(employee_id=result["employee_id"], checksum=result["checksum"]) for result in results))
+            ).delete()
+            FaceEmbedding.objects.bulk_create([
+                FaceEmbedding(
+                    employee_id=result["employee_id"],
+                    checksum=result["checksum"],
+                    encoding=result["encoding"],
+                )
+                for result in results
+            ])
+            record_changes(employee_ids)
+
+    def _remove_stale(self, current_checksums):
+        """Xoá vector của các ảnh không còn là ảnh đăng ký của nhân viên. Trả về số vector đã xoá."""
+        stale_ids, employee_ids = [], set()
+        stored = FaceEmbedding.objects.filter(employee_id__in=current_checksums).values_list("id", "employee_id", "checksum")
+        for embedding_id, employee_id, checksum in stored:
+            if checksum not in current_checksums[employee_id]:
+                stale_ids.append(embedding_id)
+                employee_ids.add(employee_id)
+        if stale_ids:
+            with transaction.atomic():
+                FaceEmbedding.objects.filter(id__in=stale_ids).delete()
+                record_changes(employee_ids)
+        return len(stale_ids)
@@ -0,0 +1,129 @@
+from collections import namedtuple
+
+import numpy as np
+
+DEFAULT_TOLERANCE = 0.5
+
+# employee_id: id nhân viên khớp nhất (None nếu vượt ngưỡng tolerance)
+# distance: khoảng cách tới khuôn mặt gần nhất
+# margin: chênh lệch giữa khoảng cách tới nhân viên gần thứ hai và gần nhất (càng lớn càng chắc chắn)
+MatchResult = namedtuple('MatchResult', ['employee_id', 'distance', 'margin'])
+
+
+# Cách so khớp khi một nhân viên có nhiều ảnh đăng ký (FACE_RECOGNITION["MATCH_STRATEGY"])
+MIN_DISTANCE = "min"  # khoảng cách nhỏ nhất tới bất kỳ ảnh nào của nhân viên
+CENTROID = "centroid"  # gallery chỉ giữ vector trung bình của các ảnh
+VOTE = "vote"  # bỏ phiếu trong k dòng gần nhất (MATCH_VOTE_K)
+STRATEGIES = (MIN_DISTANCE, CENTROID, VOTE)
+
+
+# float16 chỉ dùng để lưu trữ; NumPy không có BLAS cho float16 nên tính theo từng khối float32
+HALF_PRECISION_BLOCK = 8192
+
+
+def squared_norms(encodings):
+    if encodings.dtype == np.float16:
+        encodings = encodings.astype(np.float32)
+    return np.einsum('ij,ij->i', encodings, encodings)
+
+
+def distance_matrix(face_encodings, known_encodings, known_sq_norms=None):
+    """
+    Khoảng cách Euclid F×N giữa F khuôn mặt trong ảnh và N khuôn mặt đã biết,
+    tính bằng một phép nhân ma trận: |a - b|² = |a|² + |b|² - 2·a·b
+    """
+    half_precision = known_encodings.dtype == np.float16
+    compute_dtype = np.float32 if half_precision else known_encodings.dtype
+    faces = np.ascontiguousarray(face_encodings, dtype=compute_dtype)
+    if known_sq_norms is None:
+        known_sq_norms = squared_norms(known_encodings)
+    if half_precision:
+        distances = np.empty((len(faces), len(known_encodings)), dtype=compute_dtype)
+        for start in range(0, len(known_encodings), HALF_PRECISION_BLOCK):
+            block = known_encodings[start:start + HALF_PRECISION_BLOCK].astype(compute_dtype)
+            np.matmul(faces, block.T, out=distances[:, start:start + len(block)])
+    else:
+        distances = faces @ known_encodings.T
+    distances *= -2
+    distances += squared_norms(faces)[:, None]
+    distances += known_sq_norms[None, :]
+    np.maximum(distances, 0, out=distances)
+    return np.sqrt(distances, out=distances)
+
+
+def nearest_neighbours(distances, k=2):
+    """
+    k dòng gần nhất (đã sắp xếp) cho mỗi khuôn mặt từ ma trận khoảng cách F×N.
+    Thiếu dòng (N < k) thì điền -1 / inf.
+    """
+    count = distances.shape[1]
+    rows = np.full((len(distances), k), -1, dtype=np.intp)
+    nearest_distances = np.full((len(distances), k), np.inf)
+    if count == 0:
+        return rows, nearest_distances
+    take = min(k, count)
+    if count > take:
+        nearest = np.argpartition(distances, take - 1, axis=1)[:, :take]
+    else:
+        nearest = np.broadcast_to(np.arange(count), (len(distances), count))
+    candidate_distances = np.take_along_axis(distances, nearest, axis=1)
+    order = np.argsort(candidate_distances, axis=1)
+    rows[:, :take] = np.take_along_axis(nearest, order, axis=1)
+    nearest_distances[:, :take] = np.take_along_axis(candidate_distances, order, axis=1)
+    return rows, nearest_distances
+
+
+def build_results(rows, distances, known_ids, tolerance=DEFAULT_TOLERANCE, strategy=MIN_DISTANCE):
+    """
+    Chuyển kết quả k láng giềng gần nhất thành MatchResult cho từng khuôn mặt.
+    Một nhân viên có thể có nhiều dòng (nhiều ảnh đăng ký):
+    - MIN_DISTANCE / CENTROID: nhân viên của dòng gần nhất
+    - VOTE: nhân viên có nhiều dòng trong tolerance nhất trong k dòng, hoà thì lấy dòng gần hơn
+    margin luôn tính tới dòng gần nhất của một nhân viên *khác*.
+    """
+    results = []
+    for face_rows, face_distances in zip(rows, distances):
+        candidates = [
+            (int(known_ids[row]), float(distance))
+            for row, distance in zip(face_rows, face_distances) if row >= 0
+        ]
+        if not candidates:
+            results.append(MatchResult(None, np.inf, np.inf))
+            continue
+        best_id, best_distance = candidates[0]
+        if strategy == VOTE:
+            votes = {}
+            for employee_id, distance in candidates:
+                if distance <= tolerance:
+                    votes.setdefault(employee_id, []).append(distance)
+            if votes:
+                # Khoảng cách đã sắp xếp tăng dần nên votes[id][0] là dòng gần nhất của nhân viên đó
+                best_id = max(votes, key=lambda employee_id: (len(votes[employee_id]), -votes[employee_id][0]))
+                best_distance = votes[best_id][0]
+        runner_up = next((distance for employee_id, distance in candidates if employee_id != best_id), np.inf)
+        margin = float(runner_up - best_distance)
+        if best_distance > tolerance:
+            results.append(MatchResult(None, best_distance, margin))
+        else:
+            results.append(MatchResult(best_id, best_distance, margin))
+    return results
+
+
+def match_faces(face_encodings, known_encodings, known_ids, tolerance=DEFAULT_TOLERANCE, known_sq_norms=None):
+    """Trả về một MatchResult cho mỗi khuôn mặt trong ảnh, theo đúng thứ tự face_encodings."""
+    if len(face_encodings) == 0:
+        return []
+    if len(known_ids) == 0:
+        return [MatchResult(None, np.inf, np.inf) for _ in face_encodings]
+
+    distances = distance_matrix(face_encodings, known_encodings, known_sq_norms)
+    rows, nearest_distances = nearest_neighbours(distances, k=2)
+    return build_results(rows, nearest_distances, known_ids, tolerance)
+
+
+def best_match(results):
+    """Khuôn mặt khớp tốt nhất trong ảnh (khoảng cách nhỏ nhất), hoặc None nếu không ai khớp."""
+    matched = [result for result in results if result.employee_id is not None]
+    if not matched:
+        return None
+    return min(matched, key=lambda result: result.distance)
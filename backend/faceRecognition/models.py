@@ -0,0 +1,54 @@
+from django.db import models
+import numpy as np
+
+from employees.models import Department, Employee
+
+
+class FaceEmbedding(models.Model):
+    # Vector đặc trưng 128 chiều của ảnh khuôn mặt, lưu dạng float32 nhị phân (512 bytes)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='face_embeddings')
+    checksum = models.CharField(max_length=64)
+    encoding = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'checksum'], name='unique_employee_face_checksum'),
+        ]
+
+    def __str__(self):
+        return f"Face embedding of employee {self.employee_id} - {self.checksum[:12]}"
+
+    def as_array(self):
+        return np.frombuffer(self.encoding, dtype=np.float32)
+
+
+class FaceImage(models.Model):
+    # Ảnh đăng ký bổ sung ngoài Employee.employeeImg (ánh sáng khác, đeo kính, ...)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='face_images')
+    image = models.ImageField(upload_to='employeeFace_img/extra/')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Face image {self.id} of employee {self.employee_id}"
+
+
+class Kiosk(models.Model):
+    # Kiosk chấm công tại một địa điểm: nhận diện trước trong nhân viên của các phòng ban được gán
+    # (xem gallery.FaceGallery.kiosk_partition); không gán phòng ban nào thì tìm trong toàn bộ gallery
+    code = models.CharField(max_length=50, unique=True)  # kiosk_id gửi kèm request check-in
+    name = models.CharField(max_length=255, blank=True)
+    departments = models.ManyToManyField(Department, blank=True, related_name='kiosks')
+
+    def __str__(self):
+        return self.name or self.code
+
+
+class GalleryChange(models.Model):
+    # Nhật ký thay đổi của bộ khuôn mặt, id tăng dần chính là version của gallery
+    id = models.BigAutoField(primary_key=True)
+    employee_id = models.IntegerField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Gallery change {self.id} - employee {self.employee_id}"
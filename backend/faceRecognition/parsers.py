@@ -0,0 +1,12 @@
+from rest_framework.parsers import BaseParser
+
+
+class RawImageParser(BaseParser):
+    """
+    Nhận ảnh gửi thẳng trong body (Content-Type: image/jpeg, image/png, ...)
+    thay vì chuỗi base64 trong JSON. Các tham số khác (action, ...) gửi qua query string.
+    """
+    media_type = "image/*"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return {"image": stream.read() if stream is not None else b""}
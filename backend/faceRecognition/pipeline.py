@@ -0,0 +1,193 @@
+"""
+Các bước xử lý ảnh của luồng check-in: phát hiện và encode khuôn mặt.
+
+cv2 và face_recognition (dlib, nạp model khi import) chỉ được import khi xử lý ảnh đầu tiên,
+để các endpoint không nhận diện (đăng nhập, admin, xuất báo cáo, ...) không phải trả chi phí này.
+"""
+from collections import namedtuple
+import struct
+
+import numpy as np
+
+from facetechs import metrics
+from faceRecognition.conf import get_setting
+from faceRecognition.quality import FACE_TOO_SMALL, LowQuality, large_enough
+from faceRecognition.tracking import reuse_plan
+
+DETECTION_MODELS = ("hog", "cnn")
+MIN_DETECTION_WIDTH = 160
+MAX_UPSAMPLE = 2
+
+# max_width: ảnh rộng hơn sẽ được thu nhỏ trước khi phát hiện khuôn mặt (None = giữ nguyên)
+# upsample: number_of_times_to_upsample của face_locations
+# model: "hog" (CPU, nhanh) hoặc "cnn" (chính xác hơn, cần GPU để đủ nhanh)
+# max_faces: chỉ giữ lại các khuôn mặt lớn nhất
+# min_face_size: bỏ khuôn mặt có cạnh nhỏ hơn số điểm ảnh này trước khi encode (0 = không kiểm tra)
+DetectionOptions = namedtuple(
+    'DetectionOptions', ['max_width', 'upsample', 'model', 'max_faces', 'min_face_size'], defaults=(0,)
+)
+
+# Các mức giảm độ phân giải mà imdecode hỗ trợ ngay khi giải mã JPEG (tên hằng số trong cv2)
+REDUCED_DECODE_FLAGS = (
+    (8, "IMREAD_REDUCED_COLOR_8"),
+    (4, "IMREAD_REDUCED_COLOR_4"),
+    (2, "IMREAD_REDUCED_COLOR_2"),
+)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_size(data):
+    """Đọc (width, height) từ header JPEG mà không giải mã ảnh; None nếu không phải JPEG."""
+    if data[:2] != b"\xff\xd8":
+        return None
+    offset = 2
+    while offset + 9 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[offset + 5:offset + 9])
+            return width, height
+        segment_length = struct.unpack(">H", data[offset + 2:offset + 4])[0]
+        offset += 2 + segment_length
+    return None
+
+
+def decode_image(data, max_width=None):
+    """
+    Giải mã ảnh (bytes / bytearray / memoryview) thành mảng RGB.
+    Nếu có max_width và ảnh là JPEG đủ lớn, giải mã thẳng ở độ phân giải giảm 2/4/8 lần;
+    đổi BGR -> RGB tại chỗ nên dữ liệu điểm ảnh chỉ được cấp phát một lần.
+    Trả về None nếu không giải mã được.
+    """
+    import cv2
+
+    if not len(data):
+        return None
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    flag = cv2.IMREAD_COLOR
+    if max_width:
+        size = jpeg_size(data)
+        if size:
+            for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+                if size[0] // factor >= max_width:
+                    flag = getattr(cv2, reduced_flag)
+                    break
+    frame = cv2.imdecode(buffer, flag)
+    if frame is None:
+        return None
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+
+
+def detection_options(overrides=None):
+    """
+    Tuỳ chọn phát hiện khuôn mặt từ settings, có thể ghi đè theo từng request.
+    Giá trị không hợp lệ ném ValueError với thông báo trả về cho client.
+    """
+    overrides = overrides or {}
+    max_faces_limit = get_setting("MAX_FACES")
+    try:
+        max_width = overrides.get("max_width", get_setting("DETECTION_MAX_WIDTH"))
+        max_width = int(max_width) if max_width not in (None, "", 0, "0") else None
+        upsample = int(overrides.get("upsample", get_setting("DETECTION_UPSAMPLE")))
+        max_faces = int(overrides.get("max_faces", max_faces_limit))
+    except (TypeError, ValueError):
+        raise ValueError("Tuỳ chọn nhận diện phải là số nguyên")
+    model = overrides.get("model", get_setting("DETECTION_MODEL"))
+
+    if max_width is not None and max_width < MIN_DETECTION_WIDTH:
+        raise ValueError(f"max_width phải lớn hơn hoặc bằng {MIN_DETECTION_WIDTH}")
+    if not 0 <= upsample <= MAX_UPSAMPLE:
+        raise ValueError(f"upsample chỉ nhận giá trị từ 0 đến {MAX_UPSAMPLE}")
+    if model not in DETECTION_MODELS:
+        raise ValueError("model chỉ chấp nhận 'hog' hoặc 'cnn'")
+    if not 1 <= max_faces <= max_faces_limit:
+        raise ValueError(f"max_faces chỉ nhận giá trị từ 1 đến {max_faces_limit}")
+    min_face_size = get_setting("MIN_FACE_SIZE") if get_setting("QUALITY_GATE") else 0
+    return DetectionOptions(max_width, upsample, model, max_faces, min_face_size)
+
+
+def detect_faces(rgb_frame, options):
+    """
+    Phát hiện khuôn mặt trên ảnh đã thu nhỏ theo options.max_width rồi quy đổi
+    toạ độ (top, right, bottom, left) về độ phân giải gốc để encode cho chính xác.
+    """
+    import cv2
+    import face_recognition
+
+    height, width = rgb_frame.shape[:2]
+    scale = 1.0
+    detection_frame = rgb_frame
+    if options.max_width and width > options.max_width:
+        scale = options.max_width / width
+        detection_frame = cv2.resize(rgb_frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    locations = face_recognition.face_locations(
+        detection_frame,
+        number_of_times_to_upsample=options.upsample,
+        model=options.model,
+    )
+    # Ảnh đông người: chỉ giữ các khuôn mặt lớn nhất để không vượt quá thời gian xử lý
+    locations = sorted(locations, key=lambda box: (box[2] - box[0]) * (box[1] - box[3]), reverse=True)
+    locations = locations[:options.max_faces]
+
+    if scale == 1.0:
+        return locations
+    return [
+        (
+            max(0, int(top / scale)),
+            min(width, int(round(right / scale))),
+            min(height, int(round(bottom / scale))),
+            max(0, int(left / scale)),
+        )
+        for top, right, bottom, left in locations
+    ]
+
+
+def encode_faces(rgb_frame, face_locations):
+    import face_recognition
+
+    return face_recognition.face_encodings(rgb_frame, face_locations)
+
+
+def face_hash(rgb_frame, box):
+    """Perceptual hash 64 bit (dHash) của vùng khuôn mặt, dùng để nhận ra frame gần như giống nhau."""
+    import cv2
+
+    top, right, bottom, left = box
+    crop = rgb_frame[top:bottom, left:right]
+    if not crop.size:
+        return 0
+    gray = cv2.resize(cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY), (9, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(gray[:, 1:] > gray[:, :-1]).tobytes(), "big")
+
+
+def detect_and_encode(rgb_frame, options, reuse=None):
+    """
+    Trả về (vị trí khuôn mặt, vector đặc trưng) của ảnh; danh sách rỗng nếu không có khuôn mặt.
+    Khuôn mặt được ghép với track đã chắc chắn danh tính (reuse: tracking.ReuseHints, xem reuse_plan)
+    không được encode lại, vector tương ứng là None.
+    Khuôn mặt nhỏ hơn options.min_face_size bị bỏ; không còn khuôn mặt nào thì ném LowQuality.
+    """
+    with metrics.stage("detect"):
+        face_locations = detect_faces(rgb_frame, options)
+    if not face_locations:
+        return [], []
+    if options.min_face_size:
+        face_locations = [box for box in face_locations if large_enough(box, options.min_face_size)]
+        if not face_locations:
+            raise LowQuality(FACE_TOO_SMALL)
+    if not reuse:
+        with metrics.stage("encode"):
+            return face_locations, encode_faces(rgb_frame, face_locations)
+    pending = [i for i, reused in enumerate(reuse_plan(face_locations, reuse)) if not reused]
+    face_encodings = [None] * len(face_locations)
+    if pending:
+        with metrics.stage("encode"):
+            encodings = encode_faces(rgb_frame, [face_locations[i] for i in pending])
+        for i, encoding in zip(pending, encodings):
+            face_encodings[i] = encoding
+    return face_locations, face_encodings
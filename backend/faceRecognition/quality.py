@@ -0,0 +1,68 @@
+"""
+Loại sớm các frame kém chất lượng trước khi phát hiện / encode khuôn mặt.
+
+Frame quá tối, quá sáng hoặc bị nhoè (chuyển động, mất nét) gần như chắc chắn trả về
+"không nhận diện được" sau khi đã tốn thời gian HOG + landmark + encode. Hai bước kiểm tra:
+
+- frame_rejection: độ sáng trung bình và độ nét (phương sai Laplacian) trên ảnh xám
+  thu nhỏ về SAMPLE_WIDTH, chạy trước khi phát hiện khuôn mặt (vài ms).
+- Khuôn mặt nhỏ hơn MIN_FACE_SIZE điểm ảnh bị bỏ sau khi phát hiện, trước khi encode
+  (xem pipeline.detect_and_encode); nếu không còn khuôn mặt nào thì frame bị loại.
+
+Frame bị loại trả về lỗi kèm mã lý do (REASONS) và được đếm trong
+facetechs_quality_rejected_total{reason, skipped} (xem facetechs/metrics.py).
+"""
+from faceRecognition.conf import get_setting
+
+TOO_DARK = "too_dark"
+TOO_BRIGHT = "too_bright"
+BLURRY = "blurry"
+FACE_TOO_SMALL = "face_too_small"
+
+REASONS = {
+    TOO_DARK: "Ảnh quá tối, vui lòng đứng ở nơi đủ sáng",
+    TOO_BRIGHT: "Ảnh quá sáng, vui lòng tránh nguồn sáng chiếu thẳng vào camera",
+    BLURRY: "Ảnh bị nhoè, vui lòng đứng yên trước camera",
+    FACE_TOO_SMALL: "Khuôn mặt quá nhỏ, vui lòng đứng gần camera hơn",
+}
+
+# Độ nét được đo trên ảnh đã thu nhỏ về chiều rộng này nên ngưỡng không phụ thuộc độ phân giải camera
+SAMPLE_WIDTH = 320
+
+
+class LowQuality(Exception):
+    """Frame bị loại bởi bước kiểm tra chất lượng; args[0] là mã lý do trong REASONS."""
+
+    @property
+    def reason(self):
+        return self.args[0]
+
+
+def frame_stats(rgb_frame):
+    """(độ sáng trung bình 0-255, phương sai Laplacian) của frame trên ảnh xám thu nhỏ."""
+    import cv2
+
+    height, width = rgb_frame.shape[:2]
+    gray = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2GRAY)
+    if width > SAMPLE_WIDTH:
+        gray = cv2.resize(gray, (SAMPLE_WIDTH, max(1, height * SAMPLE_WIDTH // width)), interpolation=cv2.INTER_AREA)
+    brightness = float(gray.mean())
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    return brightness, sharpness
+
+
+def frame_rejection(rgb_frame):
+    """Mã lý do nếu frame quá tối / quá sáng / nhoè, None nếu frame đủ tốt để nhận diện."""
+    brightness, sharpness = frame_stats(rgb_frame)
+    if brightness < get_setting("QUALITY_MIN_BRIGHTNESS"):
+        return TOO_DARK
+    if brightness > get_setting("QUALITY_MAX_BRIGHTNESS"):
+        return TOO_BRIGHT
+    if sharpness < get_setting("QUALITY_MIN_SHARPNESS"):
+        return BLURRY
+    return None
+
+
+def large_enough(box, min_size):
+    top, right, bottom, left = box
+    return min(bottom - top, right - left) >= min_size
@@ -0,0 +1,157 @@
+"""
+Luồng nhận diện dùng chung cho các endpoint check-in (sync, async, streaming):
+đọc ảnh gửi lên -> giải mã -> kiểm tra chất lượng -> phát hiện + encode -> so khớp với gallery.
+"""
+import base64
+from collections import namedtuple
+
+from facetechs import metrics
+from faceRecognition.cache import get_result_cache
+from faceRecognition.conf import get_setting
+from faceRecognition.executor import detect_and_encode
+from faceRecognition.matcher import MatchResult, best_match
+from faceRecognition.pipeline import decode_image, face_hash
+from faceRecognition.quality import REASONS, LowQuality, frame_rejection
+
+# Trường trong request -> tuỳ chọn phát hiện khuôn mặt (pipeline.detection_options)
+DETECTION_OPTION_FIELDS = {
+    "detection_max_width": "max_width",
+    "detection_upsample": "upsample",
+    "detection_model": "model",
+    "max_faces": "max_faces",
+}
+
+# employee_id: nhân viên được nhận diện, cần check-in/out (None nếu đã có response)
+# face_hash: perceptual hash khuôn mặt của nhân viên đó, để lưu kết quả vào cache
+# response: (payload, status) trả thẳng cho client: lỗi hoặc kết quả còn trong cache
+Recognition = namedtuple('Recognition', ['employee_id', 'face_hash', 'response'])
+
+FAIL_RESPONSE = {
+    "status": "fail",
+    "message": "Không nhận diện được khuôn mặt hoặc không có khuôn mặt nào phù hợp",
+}
+
+
+def read_image(image):
+    """
+    Bytes của ảnh gửi lên: chuỗi base64 / data URL (JSON), bytes (body image/*)
+    hoặc file multipart. Chuỗi base64 sai định dạng ném binascii.Error.
+    """
+    if isinstance(image, str):
+        if "," in image:
+            image = image.split(",")[1]
+        return base64.b64decode(image)
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return image
+    return image.read()
+
+
+def detection_overrides(get_value):
+    """Tuỳ chọn phát hiện khuôn mặt gửi kèm request; get_value(field) trả về None nếu không có."""
+    overrides = {}
+    for field, option in DETECTION_OPTION_FIELDS.items():
+        value = get_value(field)
+        if value is not None:
+            overrides[option] = value
+    return overrides
+
+
+def kiosk_key(user, kiosk_id=None):
+    """Khoá cache của một kiosk: tài khoản đăng nhập + mã kiosk (nếu nhiều kiosk dùng chung tài khoản)."""
+    return f"{user.pk}:{kiosk_id or ''}"
+
+
+def reject_frame(reason, tracker, skipped):
+    """Phản hồi cho frame bị loại vì chất lượng kém (xem quality.py)."""
+    if tracker is not None:
+        tracker.update([], [], None)
+    metrics.count_result(reason)
+    metrics.count_quality_rejection(reason, skipped)
+    return Recognition(None, None, ({"status": "error", "reason": reason, "message": REASONS[reason]}, 200))
+
+
+def recognize(image_data, options, gallery, tracker=None, cache_scope=None, partition=None):
+    """
+    Nhận diện nhân viên trong ảnh, trả về Recognition.
+    Không truy vấn DB (gallery đã được đồng bộ trước) nên chạy được trong thread pool.
+    tracker (tracking.FaceTracker của phiên kiosk): khuôn mặt đã được theo dõi ở các frame
+    trước dùng lại danh tính thay vì encode lại.
+    cache_scope ((kiosk, action)): khuôn mặt đã xác định được danh tính (khớp gallery hoặc track đã
+    chắc chắn) và gần giống kết quả còn trong cache của chính nhân viên đó (cache.py) được trả lại
+    kết quả cũ mà không check-in lại. Hash gần giống thôi chưa đủ: hai người khác nhau có thể có hash gần nhau.
+    partition (gallery.GalleryPartition của kiosk): so khớp trong phân vùng trước, chỉ tìm trong
+    toàn bộ gallery khi không khuôn mặt nào khớp.
+    """
+    with metrics.stage("decode"):
+        rgb_frame = decode_image(image_data, max_width=get_setting("DECODE_MAX_WIDTH"))
+    if rgb_frame is None:
+        metrics.count_result("invalid_image")
+        return Recognition(None, None, ({"status": "error", "message": "Không thể xữ lý hình ảnh gửi lên"}, 400))
+
+    if not len(gallery):
+        metrics.count_result("empty_gallery")
+        return Recognition(None, None, ({"status": "error", "message": "Không có dữ liệu khuôn mặt"}, 200))
+
+    if get_setting("QUALITY_GATE"):
+        with metrics.stage("quality"):
+            reason = frame_rejection(rgb_frame)
+        if reason:
+            return reject_frame(reason, tracker, skipped="detect")
+
+    tolerance = get_setting("TOLERANCE")
+    cache = get_result_cache() if cache_scope else None
+    reuse = tracker.reuse_hints() if tracker is not None else None
+
+    # Phát hiện khuôn mặt và lấy đặc trưng (qua pool process nhận diện nếu được bật)
+    try:
+        face_locations, face_encodings = detect_and_encode(rgb_frame, options, reuse)
+    except LowQuality as rejected:
+        return reject_frame(rejected.reason, tracker, skipped="encode")
+    if not face_locations:
+        if tracker is not None:
+            tracker.update([], [], None)
+        metrics.count_result("no_face")
+        return Recognition(None, None, ({"status": "error", "message": "Không phát hiện khuôn mặt"}, 200))
+
+    # So khớp tất cả khuôn mặt được encode với gallery trong một lần tính
+    def match_encodings(encodings):
+        if partition is None:
+            with metrics.stage("match"):
+                return gallery.match(encodings, tolerance=tolerance)
+        with metrics.stage("match"):
+            results = partition.match(encodings, tolerance=tolerance)
+        if best_match(results):
+            return results
+        with metrics.stage("match_fallback"):
+            return gallery.match(encodings, tolerance=tolerance)
+
+    if tracker is not None:
+        results = tracker.update(face_locations, face_encodings, match_encodings)
+    else:
+        encoded = [i for i, encoding in enumerate(face_encodings) if encoding is not None]
+        matched = dict(zip(encoded, match_encodings([face_encodings[i] for i in encoded]))) if encoded else {}
+        results = [matched.get(i, MatchResult(None, None, None)) for i in range(len(face_locations))]
+
+    match = best_match(results)
+    if not match:
+        metrics.count_result("unknown_face")
+        return Recognition(None, None, (FAIL_RESPONSE, 200))
+
+    # Chỉ tra cache sau khi đã biết danh tính, và chỉ trong kết quả của chính nhân viên đó
+    current = face_hash(rgb_frame, face_locations[results.index(match)]) if cache is not None else None
+    if current is not None:
+        cached = cache.get(*cache_scope, current, employee_id=match.employee_id)
+        if cached:
+            metrics.count_result("cached")
+            return Recognition(None, None, cached)
+    metrics.count_result("matched")
+    return Recognition(match.employee_id, current, None)
+
+
+def remember(cache_scope, employee_id, current_hash, payload, status):
+    """Lưu kết quả check-in/out vào cache để các frame gần giống sau đó không phải xử lý lại."""
+    cache = get_result_cache()
+    if cache is None or cache_scope is None or current_hash is None or status != 200:
+        return
+    kiosk, action = cache_scope
+    cache.put(kiosk, employee_id, action, current_hash, payload, status)
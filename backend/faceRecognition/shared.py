@@ -0,0 +1,120 @@
+"""
+Gallery dùng chung giữa các worker qua file memory-mapped.
+
+Mỗi version được ghi vào một thư mục riêng (encodings.npy, sq_norms.npy, ids.npy)
+rồi file CURRENT được thay thế nguyên tử bằng os.replace để trỏ sang version mới.
+Worker map file ở chế độ copy-on-write: các trang không bị sửa được chia sẻ giữa mọi process.
+"""
+import json
+import logging
+import os
+import shutil
+import time
+
+import numpy as np
+from django.conf import settings
+
+from faceRecognition.conf import get_setting
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = "publish.lock"
+LOCK_TIMEOUT = 300  # giây, lock cũ hơn được xem là bị bỏ lại sau khi process chết
+
+
+def gallery_dir():
+    return get_setting("GALLERY_DIR") or os.path.join(settings.MEDIA_ROOT, "face_gallery")
+
+
+def read_current():
+    """Thông tin version đang được chia sẻ ({"version", "count", "path"}), hoặc None."""
+    try:
+        with open(os.path.join(gallery_dir(), CURRENT_FILE)) as current:
+            return json.load(current)
+    except (OSError, ValueError):
+        return None
+
+
+def open_gallery(meta):
+    """Map file của version trong meta; trả về (encodings, sq_norms, ids) chưa cắt theo count."""
+    path = os.path.join(gallery_dir(), meta["path"])
+    encodings = np.load(os.path.join(path, "encodings.npy"), mmap_mode="c")
+    sq_norms = np.load(os.path.join(path, "sq_norms.npy"), mmap_mode="c")
+    ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="c")
+    return encodings, sq_norms, ids
+
+
+def write_gallery(version, encodings, sq_norms, ids):
+    """
+    Ghi gallery ra thư mục version mới và chuyển CURRENT sang nó.
+    Trả về False nếu một process khác đang ghi.
+    """
+    directory = gallery_dir()
+    os.makedirs(directory, exist_ok=True)
+    if not _acquire_lock(directory):
+        return False
+    try:
+        current = read_current()
+        if current and current["version"] >= version:
+            return True
+
+        count = len(ids)
+        capacity = count + max(16, count // 8)  # chừa chỗ cho nhân viên mới mà không phải cấp phát lại
+        name = f"v{version}"
+        path = os.path.join(directory, name)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        os.makedirs(tmp_path, exist_ok=True)
+        padded = np.zeros((capacity, encodings.shape[1]), dtype=encodings.dtype)
+        padded[:count] = encodings
+        np.save(os.path.join(tmp_path, "encodings.npy"), padded)
+        padded_norms = np.zeros(capacity, dtype=sq_norms.dtype)
+        padded_norms[:count] = sq_norms
+        np.save(os.path.join(tmp_path, "sq_norms.npy"), padded_norms)
+        padded_ids = np.zeros(capacity, dtype=np.int64)
+        padded_ids[:count] = ids
+        np.save(os.path.join(tmp_path, "ids.npy"), padded_ids)
+        if os.path.exists(path):
+            shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+        current_tmp = os.path.join(directory, f"{CURRENT_FILE}.tmp{os.getpid()}")
+        with open(current_tmp, "w") as current_file:
+            json.dump({"version": version, "count": count, "path": name}, current_file)
+        os.replace(current_tmp, os.path.join(directory, CURRENT_FILE))
+        _remove_old_versions(directory, keep={name, current["path"] if current else None})
+        logger.info(f"Đã ghi gallery dùng chung version {version} ({count} khuôn mặt)")
+        return True
+    finally:
+        _release_lock(directory)
+
+
+def _acquire_lock(directory):
+    lock_path = os.path.join(directory, LOCK_FILE)
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(lock_path) < LOCK_TIMEOUT:
+                return False
+            os.remove(lock_path)
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError:
+            return False
+    os.close(fd)
+    return True
+
+
+def _release_lock(directory):
+    try:
+        os.remove(os.path.join(directory, LOCK_FILE))
+    except OSError:
+        pass
+
+
+def _remove_old_versions(directory, keep):
+    # Worker đang map version cũ vẫn đọc được sau khi file bị xoá (POSIX);
+    # trên hệ điều hành không cho xoá file đang map thì bỏ qua, lần ghi sau sẽ dọn.
+    for name in os.listdir(directory):
+        if name.startswith("v") and name not in keep:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
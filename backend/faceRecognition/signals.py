@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from employees.models import Employee
+from faceRecognition.gallery import gallery, record_change
+from faceRecognition.models import FaceEmbedding
+
+
+def _on_employee_face_changed(employee_id):
+    # Ghi nhận thay đổi sau khi transaction commit để các process khác đọc được dữ liệu mới
+    def apply():
+        record_change(employee_id)
+        if gallery.loaded:
+            gallery.sync()
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def employee_changed(sender, instance, **kwargs):
+    _on_employee_face_changed(instance.id)
+
+
+@receiver(post_save, sender=FaceEmbedding)
+@receiver(post_delete, sender=FaceEmbedding)
+def face_embedding_changed(sender, instance, **kwargs):
+    _on_employee_face_changed(instance.employee_id)
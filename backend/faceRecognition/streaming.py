@@ -0,0 +1,195 @@
+"""
+Phiên kiosk streaming qua WebSocket: kiosk giữ một kết nối và đẩy frame liên tục
+thay vì POST từng ảnh (mỗi lần một lượt xác thực JWT + parse JSON).
+
+    ws://<host>/ws/face_recognition/stream?token=<JWT access>&action=check_in&kiosk_id=<mã kiosk>
+
+- Xác thực một lần khi mở kết nối (token trong query string hoặc header Authorization),
+  yêu cầu tài khoản admin như endpoint check_in.
+- Client gửi frame dạng binary (bytes JPEG/PNG) hoặc text JSON {"image": "<base64>"};
+  đổi chế độ bằng text JSON {"action": "check_in" | "check_out"}.
+- Server chỉ giữ frame mới nhất: frame đến khi đang xử lý sẽ thay frame đang chờ
+  (frame cũ bị bỏ, đếm trong "dropped"), nên kiosk không bị trễ dần khi server chậm.
+- Kết quả của mỗi frame được xử lý được đẩy về dạng
+  {"type": "result", "frame": <số thứ tự>, "dropped": <số frame đã bỏ>, "code": <HTTP status>, ...}
+  với nội dung giống hệt phản hồi của check_in.
+
+Chỉ chạy khi triển khai bằng server ASGI (uvicorn / daphne, xem facetechs/asgi.py);
+runserver / WSGI không hỗ trợ WebSocket.
+"""
+import asyncio
+import base64
+import json
+import logging
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from facetechs import metrics
+from faceRecognition.async_views import ServerBusy, acheck_in
+from faceRecognition.checkin import ACTIONS
+from faceRecognition.conf import get_setting
+from faceRecognition.pipeline import detection_options
+from faceRecognition.recognition import detection_overrides, kiosk_key, read_image
+from faceRecognition.tracking import FaceTracker
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = "/ws/face_recognition/stream"
+
+# Mã đóng kết nối (dải 4000-4999 dành cho ứng dụng)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+CLOSE_BAD_REQUEST = 4400
+
+
+def authenticate(raw_token):
+    jwt_authentication = JWTAuthentication()
+    user = jwt_authentication.get_user(jwt_authentication.get_validated_token(raw_token))
+    close_old_connections()
+    return user
+
+
+def raw_token(scope, query):
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            parts = value.decode("latin1").split()
+            if len(parts) == 2 and parts[0] == "Bearer":
+                return parts[1]
+    tokens = query.get("token")
+    return tokens[0] if tokens else None
+
+
+class KioskSession:
+    """Một kết nối kiosk: giữ frame mới nhất và xử lý lần lượt từng frame."""
+
+    def __init__(self, send, kiosk, action, options, kiosk_id=None):
+        self._send = send
+        self.kiosk = kiosk
+        self.kiosk_id = kiosk_id
+        self.action = action
+        self.options = options
+        self._frame = None  # (số thứ tự, bytes) của frame mới nhất chưa xử lý
+        self._received = 0
+        self.dropped = 0
+        self._ready = asyncio.Event()
+        # Khuôn mặt đã nhận diện ở frame trước không cần encode lại (xem tracking.py)
+        self.tracker = FaceTracker() if get_setting("TRACKING") else None
+
+    async def send_json(self, data):
+        await self._send({"type": "websocket.send", "text": json.dumps(data, ensure_ascii=False)})
+
+    def push(self, data):
+        if self._frame is not None:
+            self.dropped += 1
+        self._received += 1
+        self._frame = (self._received, data)
+        self._ready.set()
+
+    async def handle_text(self, text):
+        try:
+            message = json.loads(text)
+            if not isinstance(message, dict):
+                raise ValueError()
+        except ValueError:
+            await self.send_json({"type": "error", "message": "Dữ liệu gửi lên không hợp lệ"})
+            return
+        if "action" in message:
+            if message["action"] not in ACTIONS:
+                await self.send_json(
+                    {"type": "error", "message": "Trường 'action' chỉ chấp nhận 'check_in' hoặc 'check_out'"}
+                )
+                return
+            self.action = message["action"]
+        if message.get("image"):
+            try:
+                self.push(read_image(message["image"]))
+            except (base64.binascii.Error, ValueError, TypeError):
+                await self.send_json({"type": "error", "message": "Ảnh không hợp lệ hoặc không thể giải mã"})
+
+    async def process(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self._frame is None:
+                continue
+            frame_number, data = self._frame
+            self._frame = None
+            metrics.count_request("stream")
+            try:
+                payload, status = await acheck_in(
+                    data, self.options, self.action, self.kiosk, self.tracker, kiosk_id=self.kiosk_id
+                )
+            except ServerBusy:
+                # Frame này bị bỏ, kiosk sẽ gửi frame mới
+                payload, status = {"status": "error", "message": "Hệ thống đang quá tải, vui lòng thử lại"}, 503
+            except Exception as e:
+                metrics.count_result("error")
+                logger.error(f"Lỗi trong quá trình nhận diện: {str(e)}", exc_info=True)
+                payload, status = {"status": "error", "message": f"Có lỗi xảy ra: {str(e)}"}, 500
+            finally:
+                # Kết nối sống lâu không đi qua request_finished: tự dọn kết nối DB cũ
+                await sync_to_async(close_old_connections)()
+            await self.send_json(
+                {"type": "result", "frame": frame_number, "dropped": self.dropped, "code": status, **payload}
+            )
+
+
+async def kiosk_stream(scope, receive, send):
+    """Ứng dụng ASGI cho STREAM_PATH."""
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    await send({"type": "websocket.accept"})
+
+    async def reject(code, text):
+        await send({"type": "websocket.send", "text": json.dumps({"type": "error", "message": text}, ensure_ascii=False)})
+        await send({"type": "websocket.close", "code": code})
+
+    query = parse_qs(scope.get("query_string", b"").decode("latin1"))
+    token = raw_token(scope, query)
+    if not token:
+        return await reject(CLOSE_UNAUTHORIZED, "Authentication credentials were not provided.")
+    try:
+        user = await sync_to_async(authenticate)(token)
+    except AuthenticationFailed as e:
+        # InvalidToken của simplejwt có detail dạng dict {"detail", "code", "messages"}
+        detail = e.detail.get("detail", "") if isinstance(e.detail, dict) else e.detail
+        return await reject(CLOSE_UNAUTHORIZED, str(detail))
+    if not user.is_staff:
+        return await reject(CLOSE_FORBIDDEN, "You do not have permission to perform this action.")
+
+    action = query.get("action", ["check_in"])[0]
+    if action not in ACTIONS:
+        return await reject(CLOSE_BAD_REQUEST, "Trường 'action' chỉ chấp nhận 'check_in' hoặc 'check_out'")
+    try:
+        options = detection_options(detection_overrides(lambda field: query.get(field, [None])[0]))
+    except ValueError as e:
+        return await reject(CLOSE_BAD_REQUEST, str(e))
+
+    kiosk_id = query.get("kiosk_id", [None])[0]
+    session = KioskSession(send, kiosk_key(user, kiosk_id), action, options, kiosk_id)
+    await session.send_json({"type": "ready", "action": action})
+    worker = asyncio.create_task(session.process())
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                session.push(message["bytes"])
+            elif message.get("text"):
+                await session.handle_text(message["text"])
+            if worker.done():
+                # Không gửi được kết quả (client đã đóng kết nối)
+                break
+    finally:
+        worker.cancel()
+        if session.tracker is not None:
+            logger.info(
+                f"Kết thúc phiên kiosk: {session.tracker.encoded} khuôn mặt được encode, "
+                f"{session.tracker.reused} lần dùng lại danh tính, bỏ qua {session.dropped} frame"
+            )
@@ -1,3 +1,112 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase
+
+from faceRecognition.cache import ResultCache, hamming
+from faceRecognition.matcher import MatchResult
+from faceRecognition.pipeline import DetectionOptions, detect_and_encode
+from faceRecognition.recognition import FAIL_RESPONSE, recognize
+from faceRecognition.tracking import FaceTracker, Track
+
+SCOPE = ("1:kiosk-a", "check_in")
+BOX = (10, 110, 110, 10)
+EMPLOYEE_A = 1
+EMPLOYEE_B = 2
+HASH_A = 0xF0F0F0F0F0F0F0F0
+# Khuôn mặt của người khác nhưng hash chỉ lệch 1 bit so với HASH_A
+HASH_CLOSE = HASH_A ^ 1
+PAYLOAD_A = {"status": "success", "message": "A đã check-in thành công lúc 08:00:00"}
+
+
+class FakeGallery:
+    def __init__(self, employee_id):
+        self.employee_id = employee_id
+
+    def __len__(self):
+        return 2
+
+    def match(self, encodings, tolerance=None):
+        return [MatchResult(self.employee_id, 0.3 if self.employee_id else None, None) for _ in encodings]
+
+
+class ResultCacheIdentityTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = ResultCache(ttl=10, max_entries=16, max_distance=10)
+        self.cache.put(SCOPE[0], EMPLOYEE_A, SCOPE[1], HASH_A, PAYLOAD_A, 200)
+        frame = np.zeros((120, 120, 3), dtype=np.uint8)
+        self.addCleanup(mock.patch.stopall)
+        mock.patch("faceRecognition.recognition.get_result_cache", return_value=self.cache).start()
+        mock.patch("faceRecognition.recognition.decode_image", return_value=frame).start()
+        mock.patch("faceRecognition.recognition.frame_rejection", return_value=None).start()
+        mock.patch("faceRecognition.recognition.face_hash", return_value=HASH_CLOSE).start()
+        self.detect = mock.patch(
+            "faceRecognition.recognition.detect_and_encode", return_value=([BOX], [np.zeros(128)])
+        ).start()
+
+    def test_unknown_face_with_close_hash_does_not_get_cached_result(self):
+        recognition = recognize(b"frame", None, FakeGallery(None), cache_scope=SCOPE)
+        self.assertEqual(recognition.response, (FAIL_RESPONSE, 200))
+        # Khuôn mặt vẫn được encode, không bị bỏ qua chỉ vì hash gần
+        self.assertIsNone(self.detect.call_args.args[2])
+
+    def test_other_employee_with_close_hash_is_checked_in(self):
+        recognition = recognize(b"frame", None, FakeGallery(EMPLOYEE_B), cache_scope=SCOPE)
+        self.assertEqual(recognition.employee_id, EMPLOYEE_B)
+        self.assertIsNone(recognition.response)
+
+    def test_same_employee_with_close_hash_gets_cached_result(self):
+        recognition = recognize(b"frame", None, FakeGallery(EMPLOYEE_A), cache_scope=SCOPE)
+        self.assertIsNone(recognition.employee_id)
+        self.assertEqual(recognition.response, (PAYLOAD_A, 200))
+
+
+class HammingTests(SimpleTestCase):
+    def test_counts_differing_bits(self):
+        self.assertEqual(hamming(HASH_A, HASH_A), 0)
+        self.assertEqual(hamming(HASH_A, HASH_CLOSE), 1)
+        self.assertEqual(hamming(0, 2**64 - 1), 64)
+
+
+class TrackerReuseTests(SimpleTestCase):
+    # Hai track chồng lên nhau (IoU ~0.43): A đã chắc chắn danh tính, B mới encode một lần
+    BOX_CONFIRMED = (0, 100, 100, 0)
+    BOX_TENTATIVE = (0, 140, 100, 40)
+    # Khuôn mặt ghép với track B (IoU ~0.9) nhưng cũng trùng track A trên ngưỡng (IoU ~0.48)
+    BOX_NEAR_TENTATIVE = (0, 135, 100, 35)
+
+    def setUp(self):
+        self.tracker = FaceTracker(iou_threshold=0.3, confirm_hits=2, refresh_frames=10, max_misses=1, max_idle=60)
+        confirmed = Track(self.BOX_CONFIRMED)
+        confirmed.employee_id, confirmed.hits = EMPLOYEE_A, 2
+        tentative = Track(self.BOX_TENTATIVE)
+        tentative.employee_id, tentative.hits = EMPLOYEE_B, 1
+        self.tracker.tracks = [confirmed, tentative]
+
+    def test_face_assigned_to_unconfirmed_track_is_encoded(self):
+        boxes = [self.BOX_CONFIRMED, self.BOX_NEAR_TENTATIVE]
+        options = DetectionOptions(None, 0, "hog", 5)
+
+        def encode_faces(frame, locations):
+            return [np.ones(128)] * len(locations)
+
+        with mock.patch("faceRecognition.pipeline.detect_faces", return_value=boxes), mock.patch(
+            "faceRecognition.pipeline.encode_faces", side_effect=encode_faces
+        ) as encode:
+            face_locations, face_encodings = detect_and_encode(
+                np.zeros((120, 160, 3), dtype=np.uint8), options, self.tracker.reuse_hints()
+            )
+        self.assertEqual(encode.call_args.args[1], [self.BOX_NEAR_TENTATIVE])
+        self.assertIsNone(face_encodings[0])
+
+        employee_c = 3
+        results = self.tracker.update(
+            face_locations, face_encodings, lambda encodings: [MatchResult(employee_c, 0.3, None)] * len(encodings)
+        )
+        self.assertEqual([result.employee_id for result in results], [EMPLOYEE_A, employee_c])
+
+    def test_unencoded_face_on_unconfirmed_track_gets_no_identity(self):
+        results = self.tracker.update(
+            [self.BOX_CONFIRMED, self.BOX_NEAR_TENTATIVE], [None, None], lambda encodings: []
+        )
+        self.assertEqual([result.employee_id for result in results], [EMPLOYEE_A, None])
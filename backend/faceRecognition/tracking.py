@@ -0,0 +1,164 @@
+"""
+Theo dõi khuôn mặt qua các frame liên tiếp của một phiên kiosk (xem streaming.py).
+
+Mỗi khuôn mặt phát hiện được ghép với track của frame trước theo IoU của box.
+Khuôn mặt thuộc một track đã chắc chắn danh tính (cùng một nhân viên trong
+TRACK_CONFIRM_HITS lần encode liên tiếp) không cần encode lại, chỉ dùng lại danh tính
+của track; cứ TRACK_REFRESH_FRAMES frame track được encode lại một lần để phát hiện
+trường hợp hai người đổi chỗ cho nhau.
+"""
+import time
+from collections import namedtuple
+
+from faceRecognition.conf import get_setting
+from faceRecognition.matcher import MatchResult
+
+
+def iou(box_a, box_b):
+    """IoU của hai box (top, right, bottom, left)."""
+    top = max(box_a[0], box_b[0])
+    right = min(box_a[1], box_b[1])
+    bottom = min(box_a[2], box_b[2])
+    left = max(box_a[3], box_b[3])
+    intersection = max(0, bottom - top) * max(0, right - left)
+    if not intersection:
+        return 0.0
+    area_a = (box_a[2] - box_a[0]) * (box_a[1] - box_a[3])
+    area_b = (box_b[2] - box_b[0]) * (box_b[1] - box_b[3])
+    return intersection / float(area_a + area_b - intersection)
+
+
+# Trạng thái các track khi nhận frame mới, gửi kèm ảnh sang detect_and_encode (có thể ở process khác):
+# boxes: box của từng track, confident: track đã chắc chắn danh tính chưa, iou: ngưỡng ghép box với track
+ReuseHints = namedtuple('ReuseHints', ['boxes', 'confident', 'iou'])
+
+
+def assign(face_locations, track_boxes, threshold):
+    """
+    Ghép tham lam theo IoU giảm dần, mỗi track và mỗi khuôn mặt chỉ được ghép một lần.
+    Trả về {chỉ số khuôn mặt: chỉ số track}.
+    """
+    pairs = sorted(
+        (
+            (iou(box, track_box), i, track_index)
+            for i, box in enumerate(face_locations)
+            for track_index, track_box in enumerate(track_boxes)
+        ),
+        reverse=True,
+    )
+    assigned, used_tracks = {}, set()
+    for overlap, i, track_index in pairs:
+        if overlap < threshold:
+            break
+        if i in assigned or track_index in used_tracks:
+            continue
+        assigned[i] = track_index
+        used_tracks.add(track_index)
+    return assigned
+
+
+def reuse_plan(face_locations, reuse):
+    """
+    Quyết định cho từng khuôn mặt của frame: True nếu được ghép với một track đã chắc chắn danh tính
+    (dùng lại danh tính, không encode), False nếu phải encode. Cùng cách ghép với FaceTracker.update
+    nên khuôn mặt không encode luôn nhận danh tính của đúng track đó.
+    """
+    assigned = assign(face_locations, reuse.boxes, reuse.iou)
+    return [i in assigned and reuse.confident[assigned[i]] for i in range(len(face_locations))]
+
+
+class Track:
+    def __init__(self, box):
+        self.box = box
+        self.employee_id = None
+        self.distance = None
+        self.hits = 0  # số lần encode liên tiếp cho cùng một danh tính
+        self.misses = 0  # số frame liên tiếp không thấy khuôn mặt
+        self.since_encode = 0  # số frame dùng lại danh tính từ lần encode gần nhất
+
+    def confident(self, confirm_hits, refresh_frames):
+        return (
+            self.employee_id is not None
+            and self.hits >= confirm_hits
+            and self.since_encode < refresh_frames
+        )
+
+    def identify(self, result):
+        if result.employee_id is not None and result.employee_id == self.employee_id:
+            self.hits += 1
+        else:
+            self.hits = 1 if result.employee_id is not None else 0
+        self.employee_id = result.employee_id
+        self.distance = result.distance
+        self.since_encode = 0
+
+
+class FaceTracker:
+    def __init__(self, iou_threshold=None, confirm_hits=None, refresh_frames=None, max_misses=None, max_idle=None):
+        self.iou_threshold = iou_threshold or get_setting("TRACK_IOU_THRESHOLD")
+        self.confirm_hits = confirm_hits or get_setting("TRACK_CONFIRM_HITS")
+        self.refresh_frames = refresh_frames or get_setting("TRACK_REFRESH_FRAMES")
+        self.max_misses = max_misses if max_misses is not None else get_setting("TRACK_MAX_MISSES")
+        self.max_idle = max_idle or get_setting("TRACK_MAX_IDLE")
+        self.tracks = []
+        self._last_update = None
+        # Thống kê cho log / benchmark
+        self.encoded = 0
+        self.reused = 0
+
+    def reuse_hints(self):
+        """
+        ReuseHints cho detect_and_encode (xem reuse_plan), None nếu chưa track nào chắc chắn danh tính
+        (mọi khuôn mặt đều phải encode).
+        """
+        if self._last_update is not None and time.monotonic() - self._last_update > self.max_idle:
+            # Kiosk ngừng gửi frame một lúc: vị trí cũ không còn đáng tin
+            self.tracks = []
+        confident = [track.confident(self.confirm_hits, self.refresh_frames) for track in self.tracks]
+        if not any(confident):
+            return None
+        return ReuseHints([track.box for track in self.tracks], confident, self.iou_threshold)
+
+    def update(self, face_locations, face_encodings, match):
+        """
+        Cập nhật track với các khuôn mặt của frame mới. face_encodings có None ở vị trí
+        khuôn mặt không được encode (reuse_plan với reuse_hints() của frame này); match(encodings)
+        trả về MatchResult cho các encoding mới. Trả về MatchResult cho từng khuôn mặt.
+        """
+        self._last_update = time.monotonic()
+        track_indexes = assign(face_locations, [track.box for track in self.tracks], self.iou_threshold)
+        assigned = {i: self.tracks[track_index] for i, track_index in track_indexes.items()}
+
+        to_match = [i for i, encoding in enumerate(face_encodings) if encoding is not None]
+        new_results = dict(zip(to_match, match([face_encodings[i] for i in to_match]))) if to_match else {}
+
+        results = []
+        seen = set()
+        for i, box in enumerate(face_locations):
+            track = assigned.get(i)
+            # Chỉ dùng lại danh tính của track đã chắc chắn, kiểm tra trước khi cập nhật track
+            reusable = track is not None and track.confident(self.confirm_hits, self.refresh_frames)
+            if track is None:
+                track = Track(box)
+                self.tracks.append(track)
+            track.box = box
+            track.misses = 0
+            seen.add(id(track))
+            if i in new_results:
+                self.encoded += 1
+                track.identify(new_results[i])
+                results.append(new_results[i])
+            elif reusable:
+                self.reused += 1
+                track.since_encode += 1
+                results.append(MatchResult(track.employee_id, track.distance, None))
+            else:
+                # Không encode nhưng track chưa chắc chắn danh tính: không dùng danh tính tạm của track,
+                # frame sau sẽ encode
+                results.append(MatchResult(None, None, None))
+
+        for track in self.tracks:
+            if id(track) not in seen:
+                track.misses += 1
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+        return results
@@ -1,5 +1,27 @@
+from django.conf import settings
 from django.urls import path
-from .views import FaceRecognitionView
-urlpatterns = [
+from .async_views import check_in_async
+from .views import EmployeeFaceImageDetailView, EmployeeFaceImagesView, FaceRecognitionView
+
+# Endpoint nhận diện (cần cv2 / dlib), có thể tách sang nhóm worker riêng (xem WORKER_GROUP trong settings.py)
+recognition_urlpatterns = [
    path("check_in", FaceRecognitionView.as_view(), name="face_recognition_employee"),
+   # Cùng chức năng với check_in, dành cho triển khai ASGI (uvicorn / daphne)
+   path("check_in_async", check_in_async, name="face_recognition_employee_async"),
 ]
+management_urlpatterns = [
+   # Ảnh đăng ký bổ sung của nhân viên (admin)
+   path("employees/<int:employee_id>/images", EmployeeFaceImagesView.as_view(), name="employee_face_images"),
+   path(
+      "employees/<int:employee_id>/images/<int:image_id>",
+      EmployeeFaceImageDetailView.as_view(),
+      name="employee_face_image_detail",
+   ),
+]
+
+if settings.WORKER_GROUP == "web":
+   urlpatterns = management_urlpatterns
+elif settings.WORKER_GROUP == "recognition":
+   urlpatterns = recognition_urlpatterns
+else:
+   urlpatterns = recognition_urlpatterns + management_urlpatterns
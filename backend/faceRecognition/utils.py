@@ -1,28 +1,82 @@
-
-from functools import lru_cache
-from employees.models import Employee
-from django.conf import settings
+import logging
 import os
-import face_recognition
 
-@lru_cache(maxsize=20) 
+from faceRecognition.conf import get_setting
+from faceRecognition.encoding import MULTIPLE_FACES, NO_FACE, encode_image, face_image_error, image_checksum
+from faceRecognition.gallery import get_gallery
+from faceRecognition.models import FaceEmbedding
+
+logger = logging.getLogger(__name__)
+
+FACE_IMAGE_ERRORS = {
+    NO_FACE: "Không tìm thấy khuôn mặt trong ảnh, vui lòng chọn ảnh chụp rõ khuôn mặt",
+    MULTIPLE_FACES: "Ảnh có nhiều hơn một khuôn mặt, vui lòng chọn ảnh chỉ có một người",
+}
+
+
+def validate_face_image(image):
+    """Thông báo lỗi nếu ảnh tải lên không dùng được để nhận diện (không có / nhiều khuôn mặt), ngược lại None."""
+    error = face_image_error(image)
+    return FACE_IMAGE_ERRORS[error] if error else None
+
+
+def employee_image_paths(employee):
+    """
+    Đường dẫn các ảnh đăng ký của nhân viên: ảnh chính trước rồi tới ảnh bổ sung mới nhất,
+    tối đa MAX_FACE_IMAGES ảnh. Không có ảnh chính thì nhân viên không được nhận diện.
+    """
+    if not employee.employeeImg:
+        return []
+    paths = [employee.employeeImg.path]
+    extra = employee.face_images.order_by('-created_at', '-id')[:get_setting("MAX_FACE_IMAGES") - 1]
+    paths.extend(face_image.image.path for face_image in extra)
+    return paths
+
+
+def enroll_employee_face(employee):
+    """
+    Đồng bộ FaceEmbedding với các ảnh đăng ký hiện tại của nhân viên (xem employee_image_paths):
+    ảnh đã có checksum trong FaceEmbedding thì không phải encode lại, vector của ảnh
+    không còn dùng bị xoá. Trả về danh sách FaceEmbedding hiện tại.
+    """
+    embeddings = []
+    try:
+        existing = {embedding.checksum: embedding for embedding in FaceEmbedding.objects.filter(employee=employee)}
+        for image_path in employee_image_paths(employee):
+            checksum = image_checksum(image_path)
+            if any(embedding.checksum == checksum for embedding in embeddings):
+                # Cùng một ảnh được tải lên hai lần
+                continue
+            if checksum in existing:
+                embeddings.append(existing[checksum])
+                continue
+
+            encoding, error = encode_image(image_path)
+            if error == MULTIPLE_FACES:
+                logger.warning(f"Ảnh {os.path.basename(image_path)} của nhân viên {employee.full_name()} có nhiều hơn một khuôn mặt")
+                continue
+            if encoding is None:
+                logger.warning(f"Không tìm thấy khuôn mặt trong ảnh {os.path.basename(image_path)} của nhân viên: {employee.full_name()}")
+                continue
+
+            embedding, _ = FaceEmbedding.objects.update_or_create(
+                employee=employee,
+                checksum=checksum,
+                defaults={"encoding": encoding.tobytes()},
+            )
+            existing[checksum] = embedding
+            embeddings.append(embedding)
+
+        FaceEmbedding.objects.filter(employee=employee).exclude(
+            checksum__in=[embedding.checksum for embedding in embeddings]
+        ).delete()
+        return embeddings
+    except Exception as e:
+        logger.error(f"Lỗi xử lý ảnh của nhân viên {employee.full_name()}: {e}")
+        return embeddings
+
+
 def load_known_faces():
-    known_face_encodings = []
-    known_face_ids = []
-    employees = Employee.objects.exclude(employeeImg='')
-    
-    for emp in employees:
-        try:
-            image_path = emp.employeeImg.path
-            image = face_recognition.load_image_file(image_path)
-            encodings = face_recognition.face_encodings(image)
-
-            if encodings:
-                known_face_encodings.append(encodings[0])
-                known_face_ids.append(emp.id)
-            else:
-                print(f"Không tìm thấy khuôn mặt trong ảnh của nhân viên: {emp.full_name()}")
-        except Exception as e:
-            print(f"Lỗi xử lý ảnh của nhân viên {emp.full_name()}: {e}")
-
-    return known_face_encodings, known_face_ids
\ No newline at end of file
+    """Trả về (encodings, ids) của gallery, đã đồng bộ với các thay đổi mới nhất."""
+    encodings, ids = get_gallery().snapshot()
+    return list(encodings), ids
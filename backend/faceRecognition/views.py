@@ -1,54 +1,55 @@
-from django.shortcuts import render
-import cv2
-import numpy as np
-import face_recognition
+from django import forms
+from django.core.exceptions import ValidationError
+from django.shortcuts import get_object_or_404, render
 from django.http import JsonResponse
 import base64
 from employees.models import Employee
-from attendance.models import Attendance
-from django.utils.timezone import now
 from rest_framework.permissions import IsAdminUser
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.views import APIView
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from employees.serializers import User
-from faceRecognition.utils import load_known_faces
+from facetechs import metrics
+from faceRecognition.checkin import employee_queryset, record_attendance
+from faceRecognition.conf import get_setting
+from faceRecognition.gallery import get_kiosk_gallery
+from faceRecognition.models import FaceImage
+from faceRecognition.parsers import RawImageParser
+from faceRecognition.pipeline import detection_options
+from faceRecognition.recognition import detection_overrides, kiosk_key, read_image, recognize, remember
+from faceRecognition.utils import enroll_employee_face, validate_face_image
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def request_value(request, name):
+    """Lấy tham số từ body (JSON / form) hoặc query string (khi body là ảnh nhị phân)."""
+    if hasattr(request.data, "get") and isinstance(request.data.get(name), (str, int)):
+        return request.data.get(name)
+    return request.query_params.get(name)
+
+
 # @method_decorator(csrf_exempt, name='dispatch')
 class FaceRecognitionView(APIView):
     permission_classes = [IsAdminUser]
+    parser_classes = [JSONParser, MultiPartParser, FormParser, RawImageParser]
 
     def post(self, request):
+        metrics.count_request("check_in")
         if request.method != "POST":
             return JsonResponse(
                 {"status": "error", "message": "Chỉ chấp nhận POST request"}, status=405
             )
         try:
-            image_base64 = request.data.get("image")
-            if not image_base64:
+            image = request.FILES.get("image") or request.data.get("image")
+            if not image:
                 return JsonResponse(
                     {"status": "error", "message": "Không có dữ liệu hình ảnh"}
                 )
 
             try:
-                if "," in image_base64:
-                    image_base64 = image_base64.split(",")[1]
-
-                image_data = base64.b64decode(image_base64)
-                np_arr = np.frombuffer(image_data, np.uint8)
-                frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-                if frame is None:
-                    return JsonResponse(
-                        {
-                            "status": "error",
-                            "message": "Không thể xữ lý hình ảnh gửi lên",
-                        },
-                        status=400,
-                    )
+                image_data = read_image(image)
             except (base64.binascii.Error, ValueError) as DecodingError:
                 return JsonResponse(
                     {
@@ -59,274 +60,26 @@ class FaceRecognitionView(APIView):
                     status=400,
                 )
 
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            known_face_encodings, known_face_ids = load_known_faces()
-            if known_face_encodings is None:
-                return JsonResponse(
-                    {"status": "error", "message": "Không có dữ liệu khuôn mặt"}
-                )
-
-            face_locations = face_recognition.face_locations(
-                rgb_frame
-            )  # Phát hiện khuôn mặt trong ảnh
-            if not face_locations:
-                return JsonResponse(
-                    {"status": "error", "message": "Không phát hiện khuôn mặt"}
-                )
-
-            face_encodings = face_recognition.face_encodings(
-                rgb_frame, face_locations
-            )  # Lấy đặc trưng khuôn mặt
-
-            recognized_id = None
-            max_attempts = 5  # Giảm số lần thử để tăng tốc độ
-            attempt = 0
-
-            while attempt < max_attempts and not recognized_id:
-
-                # Phát hiện khuôn mặt
-                face_locations = face_recognition.face_locations(rgb_frame)
-                if not face_locations:
-                    attempt += 1
-                    continue
-
-                # Lấy đặc trưng khuôn mặt
-                face_encodings = face_recognition.face_encodings(
-                    rgb_frame, face_locations
+            try:
+                options = detection_options(
+                    detection_overrides(lambda field: request_value(request, field))
                 )
-
-                for face_encoding in face_encodings:
-                    # So sánh với các khuôn mặt đã biết
-                    matches = face_recognition.compare_faces(
-                        known_face_encodings, face_encoding, tolerance=0.5
-                    )
-                    face_distances = face_recognition.face_distance(
-                        known_face_encodings, face_encoding
-                    )
-
-                    if True in matches:
-                        best_match_index = np.argmin(face_distances)
-                        if matches[best_match_index]:
-                            recognized_id = known_face_ids[best_match_index]
-                            break
-                attempt += 1
+            except ValueError as e:
+                return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+            action = request_value(request, "action") or ""
+            kiosk_id = request_value(request, "kiosk_id")
+            cache_scope = (kiosk_key(request.user, kiosk_id), action)
+            gallery, partition = get_kiosk_gallery(kiosk_id)
+            recognition = recognize(image_data, options, gallery, cache_scope=cache_scope, partition=partition)
+            if recognition.response:
+                payload, status = recognition.response
+                return JsonResponse(payload, status=status)
 
             # Xử lý sau nhận diện
-            if recognized_id:
+            with metrics.stage("attendance"):
                 try:
-                    employee = Employee.objects.get(id=recognized_id)
-                    # Kiểm tra trạng thái nhân viên
-                    if employee.status != "Active":
-                        return JsonResponse(
-                            {
-                                "status": "error",
-                                "message": f"{employee.full_name()} đã nghĩ việc nên không được phép check_in/out",
-                            },
-                        )
-
-                    action = request.data.get("action", "")
-                    if action not in ["check_in", "check_out"]:
-                        return JsonResponse(
-                            {
-                                "status": "error",
-                                "message": "Trường 'action' bắt buộc và chỉ chấp nhận 'check_in' hoặc 'check_out'",
-                            },
-                            status=400,
-                        )
-                    # Kiểm tra đã điểm danh chưa
-                    today = now().date()  # Lấy ngày hiện tại
-                    # taor attendance nếu chưa có
-
-                    attendance = Attendance.objects.filter(
-                        employeeId_id=recognized_id,
-                        date=today,
-                    ).first()
-                    if action == "check_in":
-                        if not attendance:
-                            attendance = Attendance.objects.create(
-                                employeeId_id=recognized_id, date=today, check_in=now()
-                            )
-                            attendance.save()
-                            return JsonResponse(
-                                {
-                                    "status": "success",
-                                    "action": "check_in",
-                                    "message": f"{employee.full_name()} đã check-in thành công lúc {attendance.check_in.strftime('%H:%M:%S')}",
-                                    "employee": {
-                                        "employeeId": recognized_id,
-                                        "employee_name": employee.full_name(),
-                                        "department": (
-                                            employee.department.name
-                                            if employee.department
-                                            else None
-                                        ),
-                                        "position": (
-                                            employee.position.name
-                                            if employee.position
-                                            else None
-                                        ),
-                                        "employee_code": employee.employee_code,
-                                    },
-                                    "attendance": {
-                                        "check_in": attendance.check_in.strftime(
-                                            "%Y-%m-%d %H:%M:%S"
-                                        ),
-                                        "status": attendance.status,
-                                    },
-                                }
-                            )
-                        if attendance.status == "Absent":
-                            return JsonResponse(
-                                {
-                                    "status": "error",
-                                    "message": f"{employee.full_name()} đã bị đánh dấu vắng mặt, không thể check-in.",
-                                },
-                            )
-                        if not attendance.check_in:
-                            attendance.check_in = now()
-                            attendance.save()
-                            return JsonResponse(
-                                {
-                                    "status": "success",
-                                    "action": "check_in",
-                                    "message": f" {employee.full_name()} đã check-in thành công lúc {attendance.check_in.strftime('%H:%M:%S')}",
-                                    "employee": {
-                                        "employeeId": recognized_id,
-                                        "employee_name": employee.full_name(),
-                                        "department": (
-                                            employee.department.name
-                                            if employee.department
-                                            else None
-                                        ),
-                                        "position": (
-                                            employee.position.name
-                                            if employee.position
-                                            else None
-                                        ),
-                                        "employee_code": employee.employee_code,
-                                    },
-                                    "attendance": {
-                                        "check_in": now().strftime("%Y-%m-%d %H:%M:%S"),
-                                        "status": attendance.status,
-                                    },
-                                }
-                            )
-                        else:
-                            return JsonResponse(
-                                {
-                                    "status": "warning",
-                                    "message": f"{employee.full_name()} đã check-in hôm nay.",
-                                    "employee": {
-                                        "employeeId": recognized_id,
-                                        "employee_name": employee.full_name(),
-                                        "department": (
-                                            employee.department.name
-                                            if employee.department
-                                            else None
-                                        ),
-                                        "position": (
-                                            employee.position.name
-                                            if employee.position
-                                            else None
-                                        ),
-                                        "employee_code": employee.employee_code,
-                                    },
-                                    "attendance": {
-                                        "check_in": attendance.check_in.strftime(
-                                            "%Y-%m-%d %H:%M:%S"
-                                        ),
-                                        "check_out": (
-                                            attendance.check_out.strftime(
-                                                "%Y-%m-%d %H:%M:%S"
-                                            )
-                                            if attendance.check_out
-                                            else None
-                                        ),
-                                        "status": attendance.status,
-                                    },
-                                }
-                            )
-                    elif action == "check_out":
-                        if not attendance:
-                            return JsonResponse(
-                                {
-                                    "status": "error",
-                                    "message": f"{employee.full_name()} chưa check-in hôm nay nên không thể check-out",
-                                }
-                            )
-                        if attendance.status == "Absent":
-                            return JsonResponse(
-                                {
-                                    "status": "error",
-                                    "message": f"{employee.full_name()} đã bị đánh dấu vắng mặt, không thể check-out.",
-                                },
-                            )
-                        elif not attendance.check_out:
-                            attendance.check_out = now()
-                            attendance.save()
-                            return JsonResponse(
-                                {
-                                    "status": "success",
-                                    "action": "check_out",
-                                    "message": f"{employee.full_name()} đã check-out thành công lúc {attendance.check_out.strftime('%H:%M:%S')}",
-                                    "employee": {
-                                        "employeeId": recognized_id,
-                                        "employee_name": employee.full_name(),
-                                        "department": (
-                                            employee.department.name
-                                            if employee.department
-                                            else None
-                                        ),
-                                        "position": (
-                                            employee.position.name
-                                            if employee.position
-                                            else None
-                                        ),
-                                        "employee_code": employee.employee_code,
-                                    },
-                                    "attendance": {
-                                        "check_out": now().strftime(
-                                            "%Y-%m-%d %H:%M:%S"
-                                        ),
-                                    },
-                                }
-                            )
-                        else:
-                            return JsonResponse(
-                                {
-                                    "status": "warning",
-                                    "message": f"{employee.full_name()} đã check out hôm nay.",
-                                    "employee": {
-                                        "employeeId": recognized_id,
-                                        "employee_name": employee.full_name(),
-                                        "department": (
-                                            employee.department.name
-                                            if employee.department
-                                            else None
-                                        ),
-                                        "position": (
-                                            employee.position.name
-                                            if employee.position
-                                            else None
-                                        ),
-                                        "employee_code": employee.employee_code,
-                                    },
-                                    "attendance": {
-                                        "check_in": attendance.check_in.strftime(
-                                            "%Y-%m-%d %H:%M:%S"
-                                        ),
-                                        "check_out": (
-                                            attendance.check_out.strftime(
-                                                "%Y-%m-%d %H:%M:%S"
-                                            )
-                                            if attendance.check_out
-                                            else None
-                                        ),
-                                        "status": attendance.status,
-                                    },
-                                }
-                            )
+                    employee = employee_queryset().get(id=recognition.employee_id)
                 except Employee.DoesNotExist:
                     return JsonResponse(
                         {
@@ -334,16 +87,85 @@ class FaceRecognitionView(APIView):
                             "message": "Không tìm thấy nhân viên trong hệ thống",
                         }
                     )
-
-            return JsonResponse(
-                {
-                    "status": "fail",
-                    "message": "Không nhận diện được khuôn mặt hoặc không có khuôn mặt nào phù hợp",
-                }
-            )
+                payload, status = record_attendance(employee, action)
+            remember(cache_scope, employee.id, recognition.face_hash, payload, status)
+            return JsonResponse(payload, status=status)
 
         except Exception as e:
+            metrics.count_result("error")
             logger.error(f"Lỗi trong quá trình nhận diện: {str(e)}", exc_info=True)
             return JsonResponse(
                 {"status": "error", "message": f"Có lỗi xảy ra: {str(e)}"}, status=500
             )
+
+
+def face_images_payload(employee):
+    return {
+        "status": "success",
+        "employeeImg": employee.employeeImg.url if employee.employeeImg else None,
+        "images": [
+            {"id": face_image.id, "image": face_image.image.url, "created_at": face_image.created_at.isoformat()}
+            for face_image in employee.face_images.order_by('-created_at', '-id')
+        ],
+        "embeddings": employee.face_embeddings.count(),
+        "max_images": get_setting("MAX_FACE_IMAGES"),
+    }
+
+
+class EmployeeFaceImagesView(APIView):
+    """Ảnh đăng ký bổ sung của một nhân viên: xem danh sách, tải thêm ảnh (field "images")."""
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def get(self, request, employee_id):
+        employee = get_object_or_404(Employee, id=employee_id)
+        return JsonResponse(face_images_payload(employee))
+
+    def post(self, request, employee_id):
+        employee = get_object_or_404(Employee.objects.select_related('user'), id=employee_id)
+        files = request.FILES.getlist("images") or request.FILES.getlist("image")
+        if not files:
+            return JsonResponse({"status": "error", "message": "Không có dữ liệu hình ảnh"}, status=400)
+        if not employee.employeeImg:
+            return JsonResponse(
+                {"status": "error", "message": "Nhân viên chưa có ảnh chính, hãy cập nhật ảnh nhân viên trước"},
+                status=400,
+            )
+        # Ảnh chính chiếm một chỗ trong giới hạn MAX_FACE_IMAGES
+        available = get_setting("MAX_FACE_IMAGES") - 1 - employee.face_images.count()
+        if len(files) > available:
+            return JsonResponse(
+                {"status": "error", "message": f"Mỗi nhân viên chỉ được thêm tối đa {max(available, 0)} ảnh nữa"},
+                status=400,
+            )
+        try:
+            for image in files:
+                forms.ImageField().clean(image)
+        except ValidationError:
+            return JsonResponse(
+                {"status": "error", "message": "Định dạng hình ảnh không hợp lệ. Vui lòng tải lên tệp hình ảnh thực tế."},
+                status=400,
+            )
+        # Ảnh không có hoặc có nhiều hơn một khuôn mặt bị từ chối, không ảnh nào được lưu
+        for image in files:
+            error = validate_face_image(image)
+            if error:
+                return JsonResponse({"status": "error", "message": f"{image.name}: {error}"}, status=400)
+
+        for image in files:
+            FaceImage.objects.create(employee=employee, image=image)
+        enroll_employee_face(employee)
+        payload = face_images_payload(employee)
+        return JsonResponse(payload, status=201)
+
+
+class EmployeeFaceImageDetailView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def delete(self, request, employee_id, image_id):
+        face_image = get_object_or_404(FaceImage.objects.select_related('employee__user'), id=image_id, employee_id=employee_id)
+        employee = face_image.employee
+        face_image.image.delete(save=False)
+        face_image.delete()
+        enroll_employee_face(employee)
+        return JsonResponse(face_images_payload(employee))
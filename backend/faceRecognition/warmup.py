@@ -0,0 +1,154 @@
+"""
+Làm nóng process web trước request check-in đầu tiên: nạp model dlib, dựng gallery
+và khởi động pool process nhận diện (nếu bật RECOGNITION_WORKERS).
+
+Bật bằng FACE_RECOGNITION['WARMUP'] (mặc định tắt), gọi từ FaceRecognitionConfig.ready():
+- "background": làm nóng trong một thread nền của từng worker, worker vẫn nhận request ngay
+  (request đến sớm chờ gallery nạp xong thay vì tự nạp lại).
+- "preload": làm nóng ngay trong ready(), dành cho server nạp ứng dụng trước khi fork
+  (gunicorn --preload): model và gallery được nạp một lần ở process cha rồi chia sẻ
+  copy-on-write cho các worker; pool nhận diện được khởi động trong từng worker sau fork.
+
+Endpoint /ready (facetechs/views.py) trả 503 cho tới khi process làm nóng xong, để load
+balancer chỉ chuyển request tới worker đã sẵn sàng.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from django.db import connections
+
+from faceRecognition.conf import get_setting
+
+logger = logging.getLogger(__name__)
+
+MODES = ("background", "preload")
+
+IDLE = "idle"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+_lock = threading.Lock()
+_state = {"status": IDLE, "mode": None, "seconds": None, "error": None}
+
+
+# Tên chương trình của các server ứng dụng (sys.argv[0]); mọi lệnh khác (django-admin, pytest,
+# celery, script benchmark, ...) không làm nóng
+SERVERS = ("gunicorn", "uvicorn", "daphne", "hypercorn", "uwsgi", "mod_wsgi")
+
+
+def _program():
+    path = sys.argv[0] if sys.argv else ""
+    name = os.path.basename(path)
+    if name == "__main__.py":
+        # python -m gunicorn / uvicorn / daphne
+        name = os.path.basename(os.path.dirname(path))
+    return name
+
+
+def serving():
+    """ready() cũng chạy với migrate, enroll_faces, test, ...: chỉ làm nóng khi chạy server."""
+    program = _program()
+    if program in SERVERS:
+        return True
+    if program != "manage.py" or sys.argv[1:2] != ["runserver"]:
+        return False
+    # runserver có autoreload: chỉ process con (RUN_MAIN) phục vụ request
+    return os.environ.get("RUN_MAIN") == "true" or "--noreload" in sys.argv
+
+
+def warm_models():
+    """Nạp model dlib và chạy thử một lần detect + encode trên ảnh trống."""
+    from faceRecognition import pipeline
+
+    frame = np.zeros((160, 160, 3), dtype=np.uint8)
+    pipeline.detect_faces(frame, pipeline.DetectionOptions(None, 0, "hog", 1))
+    pipeline.encode_faces(frame, [(0, 160, 160, 0)])
+
+
+def warm_executor():
+    from faceRecognition.executor import get_executor
+
+    executor = get_executor()
+    if executor is not None:
+        executor.warm_up()
+
+
+def _run(steps):
+    started = time.monotonic()
+    try:
+        for step in steps:
+            step()
+    except Exception as e:
+        logger.error(f"Làm nóng thất bại: {e}", exc_info=True)
+        with _lock:
+            _state.update(status=FAILED, error=str(e))
+        return
+    finally:
+        # Không giữ kết nối DB của thread nền / của process cha trước khi fork
+        connections.close_all()
+    seconds = time.monotonic() - started
+    with _lock:
+        # preload: cộng cả thời gian làm nóng ở process cha lẫn trong worker
+        seconds = round((_state["seconds"] or 0) + seconds, 3)
+        _state.update(status=READY, seconds=seconds)
+    logger.info(f"Đã làm nóng process {os.getpid()} trong {seconds} giây")
+
+
+def _warm_gallery():
+    from faceRecognition.gallery import get_gallery
+
+    get_gallery()
+
+
+def start(mode=None):
+    """Bắt đầu làm nóng theo FACE_RECOGNITION['WARMUP']; không làm gì nếu tắt."""
+    mode = mode or get_setting("WARMUP")
+    if not mode:
+        return
+    if mode not in MODES:
+        raise ValueError(f"FACE_RECOGNITION['WARMUP'] không hợp lệ: {mode!r} (chỉ chấp nhận 'background' hoặc 'preload')")
+    with _lock:
+        if _state["status"] != IDLE:
+            return
+        _state.update(status=WARMING, mode=mode)
+
+    if mode == "background":
+        threading.Thread(
+            target=_run, args=([warm_models, _warm_gallery, warm_executor],), name="face-warmup", daemon=True
+        ).start()
+        return
+
+    # preload: pool process không dùng được qua fork, mỗi worker tự khởi động pool của mình
+    _run([warm_models, _warm_gallery])
+    if get_setting("RECOGNITION_WORKERS"):
+        with _lock:
+            if _state["status"] != READY:
+                return
+            _state.update(status=WARMING)
+        parent = os.getpid()
+        os.register_at_fork(after_in_child=lambda: _after_fork(parent))
+
+
+def _after_fork(parent):
+    # Process nhận diện do worker fork ra cũng gọi hook này: chỉ worker (con trực tiếp) mới khởi động pool
+    if os.getppid() != parent:
+        return
+    threading.Thread(target=_run, args=([warm_executor],), name="face-warmup", daemon=True).start()
+
+
+def status():
+    """Trạng thái làm nóng của process hiện tại cho endpoint /ready."""
+    from faceRecognition.gallery import gallery
+
+    with _lock:
+        state = dict(_state)
+    # Không bật làm nóng thì không có gì để chờ
+    state["ready"] = state["status"] == READY or state["mode"] is None
+    state["pid"] = os.getpid()
+    state["gallery"] = {"loaded": gallery.loaded, "version": gallery.version, "size": len(gallery)}
+    return state
@@ -9,8 +9,22 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'facetechs.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Import sau get_asgi_application() vì cần Django đã được setup
+from faceRecognition.streaming import STREAM_PATH, kiosk_stream  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # WebSocket chỉ dùng cho phiên kiosk streaming, còn lại là các request HTTP của Django
+    if scope["type"] == "websocket":
+        if scope["path"] == STREAM_PATH and settings.WORKER_GROUP != "web":
+            return await kiosk_stream(scope, receive, send)
+        await receive()
+        return await send({"type": "websocket.close", "code": 4404})
+    return await django_application(scope, receive, send)
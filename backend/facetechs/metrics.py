@@ -0,0 +1,170 @@
+"""
+Đo thời gian các bước xử lý và xuất số liệu dạng Prometheus text.
+
+- stage(name): đo một bước (dùng như context manager hoặc decorator); thời gian được ghi
+  vào histogram facetechs_stage_seconds{stage=name} và, trong request HTTP, vào header
+  Server-Timing (xem middleware.ServerTimingMiddleware).
+- count_request / count_result: số request check-in theo endpoint và theo kết quả.
+- count_quality_rejection: số frame bị loại trước khi nhận diện và bước nặng được bỏ qua.
+- render(): toàn bộ số liệu cho endpoint /api/metrics.
+
+Số liệu được giữ trong bộ nhớ của từng process: khi chạy nhiều worker, Prometheus
+cần scrape từng worker (hoặc chạy một worker với nhiều thread).
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Danh sách (tên bước, giây) của request hiện tại, None nếu không có request nào đang thu thập
+_timings = ContextVar("timings", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # nhãn -> [số đếm từng bucket, tổng, số lần]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    labels = _format_labels(self.labelnames, key, ("le", repr(float(bound))))
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                labels = _format_labels(self.labelnames, key, ("le", "+Inf"))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "facetechs_stage_seconds",
+    "Thời gian từng bước xử lý (decode, detect, encode, match, attendance, db, ...)",
+    ["stage"],
+)
+CHECKIN_REQUESTS = Counter(
+    "facetechs_checkin_requests_total", "Số request check-in theo endpoint", ["endpoint"]
+)
+CHECKIN_RESULTS = Counter(
+    "facetechs_checkin_results_total",
+    "Kết quả nhận diện: matched, no_face, unknown_face, cached, invalid_image, empty_gallery, busy, error, "
+    "too_dark, too_bright, blurry, face_too_small",
+    ["result"],
+)
+QUALITY_REJECTED = Counter(
+    "facetechs_quality_rejected_total",
+    "Số frame bị loại vì chất lượng kém theo lý do và bước được bỏ qua (detect = cả detect và encode)",
+    ["reason", "skipped"],
+)
+REGISTRY = [CHECKIN_REQUESTS, CHECKIN_RESULTS, QUALITY_REJECTED, STAGE_SECONDS]
+
+
+def record(name, seconds):
+    STAGE_SECONDS.observe(seconds, stage=name)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+@contextmanager
+def collect():
+    """Thu thập các bước được đo trong khối lệnh (request HTTP, lượt xử lý trong process con)."""
+    timings = []
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def count_request(endpoint):
+    CHECKIN_REQUESTS.inc(endpoint=endpoint)
+
+
+def count_result(result):
+    CHECKIN_RESULTS.inc(result=result)
+
+
+def count_quality_rejection(reason, skipped):
+    QUALITY_REJECTED.inc(reason=reason, skipped=skipped)
+
+
+def server_timing(timings, total=None):
+    """Giá trị header Server-Timing; các bước trùng tên được cộng dồn."""
+    durations = {}
+    for name, seconds in timings:
+        durations[name] = durations.get(name, 0.0) + seconds
+    if total is not None:
+        durations["total"] = total
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in durations.items())
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
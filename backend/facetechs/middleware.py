@@ -0,0 +1,57 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connection
+
+from facetechs import metrics
+
+
+class ServerTimingMiddleware:
+    """
+    Thêm header Server-Timing với thời gian các bước đo bằng metrics.stage trong request
+    (decode, detect, encode, match, ...), tổng thời gian truy vấn DB ("db") và toàn request ("total").
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        database = DatabaseTimer()
+        with metrics.collect() as timings:
+            # Wrapper gắn với kết nối DB của thread đang xử lý request
+            with connection.execute_wrapper(database):
+                response = self.get_response(request)
+            if database.queries:
+                metrics.record("db", database.seconds)
+        response["Server-Timing"] = metrics.server_timing(timings, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        # View async truy vấn DB qua thread khác nên không đo được "db" tổng; các bước vẫn được đo
+        started = time.perf_counter()
+        with metrics.collect() as timings:
+            response = await self.get_response(request)
+        response["Server-Timing"] = metrics.server_timing(timings, time.perf_counter() - started)
+        return response
+
+
+class DatabaseTimer:
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - started
@@ -54,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "facetechs.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -170,3 +171,47 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 CORS_ALLOWED_ORIGINS = [
 
 ]
+
+
+# Nhóm worker mà process này thuộc về (xem facetechs/urls.py):
+# - "all": phục vụ mọi endpoint
+# - "web": không phục vụ endpoint nhận diện (check_in, check_in_async, WebSocket streaming) nên không
+#   bao giờ import cv2 / dlib; "recognition": chỉ phục vụ các endpoint đó (cùng /ready, /api/metrics).
+# Reverse proxy chuyển /api/face_recognition/check_in* và /ws/ tới nhóm recognition, còn lại tới nhóm web.
+WORKER_GROUP = config("WORKER_GROUP", default="all")
+
+# Cấu hình giờ làm (AttendanceConfig) được cache trong từng process, nạp lại sau số giây này
+# (process đã lưu cấu hình thấy ngay, xem attendance/config_cache.py)
+ATTENDANCE_CONFIG_CACHE_SECONDS = config("ATTENDANCE_CONFIG_CACHE_SECONDS", default=60, cast=int)
+
+# Nhận diện khuôn mặt (xem faceRecognition/conf.py để biết giá trị mặc định)
+FACE_RECOGNITION = {
+    "TOLERANCE": 0.5,
+    "MAX_FACE_IMAGES": config("FACE_MAX_FACE_IMAGES", default=5, cast=int),
+    "MATCH_STRATEGY": config("FACE_MATCH_STRATEGY", default="min"),
+    "MATCH_VOTE_K": config("FACE_MATCH_VOTE_K", default=5, cast=int),
+    "PARTITION_REFRESH": config("FACE_PARTITION_REFRESH", default=60, cast=float),
+    "GALLERY_DTYPE": config("FACE_GALLERY_DTYPE", default="float32"),
+    "DECODE_MAX_WIDTH": config("FACE_DECODE_MAX_WIDTH", default=None, cast=lambda value: int(value) if value else None),
+    "DETECTION_MAX_WIDTH": config("FACE_DETECTION_MAX_WIDTH", default=640, cast=int),
+    "DETECTION_UPSAMPLE": config("FACE_DETECTION_UPSAMPLE", default=1, cast=int),
+    "DETECTION_MODEL": config("FACE_DETECTION_MODEL", default="hog"),
+    "MAX_FACES": config("FACE_MAX_FACES", default=5, cast=int),
+    "WARMUP": config("FACE_WARMUP", default=None),
+    "RECOGNITION_WORKERS": config("FACE_RECOGNITION_WORKERS", default=0, cast=int),
+    "INDEX": config("FACE_INDEX", default="brute"),
+    "IVF_NPROBE": config("FACE_IVF_NPROBE", default=8, cast=int),
+    "SHARED_GALLERY": config("FACE_SHARED_GALLERY", default=False, cast=bool),
+    "GALLERY_DIR": config("FACE_GALLERY_DIR", default=None),
+    "ASYNC_MAX_CONCURRENCY": config("FACE_ASYNC_MAX_CONCURRENCY", default=4, cast=int),
+    "ASYNC_MAX_QUEUE": config("FACE_ASYNC_MAX_QUEUE", default=200, cast=int),
+    "ASYNC_QUEUE_TIMEOUT": config("FACE_ASYNC_QUEUE_TIMEOUT", default=30, cast=float),
+    "QUALITY_GATE": config("FACE_QUALITY_GATE", default=True, cast=bool),
+    "QUALITY_MIN_SHARPNESS": config("FACE_QUALITY_MIN_SHARPNESS", default=30, cast=float),
+    "MIN_FACE_SIZE": config("FACE_MIN_FACE_SIZE", default=60, cast=int),
+    "TRACKING": config("FACE_TRACKING", default=True, cast=bool),
+    "TRACK_CONFIRM_HITS": config("FACE_TRACK_CONFIRM_HITS", default=2, cast=int),
+    "TRACK_REFRESH_FRAMES": config("FACE_TRACK_REFRESH_FRAMES", default=30, cast=int),
+    "RESULT_CACHE_TTL": config("FACE_RESULT_CACHE_TTL", default=10, cast=float),
+    "RESULT_CACHE_MAX_ENTRIES": config("FACE_RESULT_CACHE_MAX_ENTRIES", default=1024, cast=int),
+}
@@ -15,13 +15,19 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 from django.shortcuts import redirect
+from facetechs.views import MetricsView, ReadyView
 
 def redirect_view(request):
     return redirect('admin/')
+
+if settings.WORKER_GROUP not in ("all", "web", "recognition"):
+    raise ImproperlyConfigured(f"WORKER_GROUP không hợp lệ: {settings.WORKER_GROUP!r} (chỉ chấp nhận all, web, recognition)")
+
 urlpatterns = [
     path('', redirect_view),
 
@@ -31,8 +37,18 @@ urlpatterns = [
     path('api/face_recognition/',include('faceRecognition.urls')),
     path('api/attendance/',include('attendance.urls')),
     path('api/admin/',include('admins.urls')),
+    path('api/metrics', MetricsView.as_view(), name='metrics'),
+    path('ready', ReadyView.as_view(), name='ready'),
 
 ]
 
+if settings.WORKER_GROUP == "recognition":
+    # Worker chỉ nhận diện: không phục vụ đăng nhập, admin, báo cáo, ...
+    urlpatterns = [
+        path('api/face_recognition/',include('faceRecognition.urls')),
+        path('api/metrics', MetricsView.as_view(), name='metrics'),
+        path('ready', ReadyView.as_view(), name='ready'),
+    ]
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
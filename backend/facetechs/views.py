@@ -0,0 +1,29 @@
+from django.http import HttpResponse, JsonResponse
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.views import APIView
+
+from facetechs import metrics
+from faceRecognition import warmup
+
+
+class MetricsView(APIView):
+    """Số liệu của process hiện tại ở định dạng Prometheus text, chỉ dành cho admin."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class ReadyView(APIView):
+    """
+    Readiness check cho load balancer: 503 cho tới khi process làm nóng xong (xem faceRecognition/warmup.py),
+    kèm version gallery và thời gian làm nóng. Không cần đăng nhập.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        state = warmup.status()
+        return JsonResponse(state, status=200 if state["ready"] else 503)
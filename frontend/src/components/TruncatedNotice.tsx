@@ -0,0 +1,15 @@
+import { AlertCircle } from 'lucide-react'
+import { Alert, AlertDescription } from '@/components/ui/alert'
+
+// Cảnh báo khi lịch sử điểm danh dừng ở giới hạn số trang (fetchAllPages): số liệu hiển thị chưa đủ
+export function TruncatedNotice({ count }: { count: number }) {
+  return (
+    <Alert className='mb-4'>
+      <AlertCircle />
+      <AlertDescription>
+        Chỉ tải được {count} bản ghi đầu tiên, số liệu thống kê bên dưới có thể chưa đầy đủ. Vui lòng thu hẹp khoảng
+        thời gian hoặc bộ lọc.
+      </AlertDescription>
+    </Alert>
+  )
+}
@@ -3,12 +3,23 @@ import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
 import {
   AttendanceConfigFormValues,
   AttendanceConfigType,
+  AttendanceHistoryFilters,
   AttendanceHistoryResponseType,
   CreateEmployeeFormValues,
   EmployeeListResponseType,
   UpdateEmployeeFormValues
 } from '@/schemas/admin.shema'
-import { format, startOfWeek, endOfWeek, eachDayOfInterval, parseISO } from 'date-fns'
+import {
+  format,
+  min,
+  startOfMonth,
+  startOfQuarter,
+  startOfWeek,
+  startOfYear,
+  endOfWeek,
+  eachDayOfInterval,
+  parseISO
+} from 'date-fns'
 import { AttendanceStatus } from '@/constants/type'
 
 // Hook để xuất file Excel
@@ -19,16 +30,16 @@ export const useExportAttendanceExcel = () => {
   })
 }
 
-export const useAttendanceHistory = () => {
+export const useAttendanceHistory = (filters: AttendanceHistoryFilters = {}) => {
   return useQuery({
-    queryKey: ['attendance-history'],
+    queryKey: ['attendance-history', filters],
     // queryFn: adminService.getHistory,
     queryFn: async () => {
       try {
         // Thêm log để theo dõi việc gọi API
         console.log('Đang gọi API lấy danh sách nhân viên...')
-        const result = await adminService.getHistory()
-        console.log('API trả về dữ liệu thành công', result.length, 'nhân viên')
+        const result = await adminService.getHistory(filters)
+        console.log('API trả về dữ liệu thành công', result.results.length, 'nhân viên')
         return result
       } catch (error) {
         console.error('Lỗi khi gọi API:', error)
@@ -40,10 +51,40 @@ export const useAttendanceHistory = () => {
   })
 }
 
+// Hook để lấy các bản ghi điểm danh mới nhất (một trang)
+export const useRecentAttendance = (limit: number) => {
+  return useQuery({
+    queryKey: ['attendance-history', 'recent', limit],
+    queryFn: () => adminService.getRecentHistory(limit),
+    refetchOnWindowFocus: false,
+    refetchOnReconnect: false
+  })
+}
+
+// Ngày bắt đầu của khoảng thời gian báo cáo
+const rangeStart = (timeRange: string, today: Date) => {
+  switch (timeRange) {
+    case 'weekly':
+      return startOfWeek(today, { weekStartsOn: 1 }) // Tuần bắt đầu từ thứ 2
+    case 'monthly':
+      return startOfMonth(today)
+    case 'quarterly':
+      return startOfQuarter(today)
+    case 'yearly':
+      return startOfYear(today)
+    default:
+      return today
+  }
+}
+
 // Hook để lấy dữ liệu thống kê báo cáo theo thời gian
 export const useAttendanceReport = (timeRange: string) => {
-  const { data: attendances, isLoading, error } = useAttendanceHistory()
+  const today = new Date()
+  // Chỉ tải dữ liệu từ đầu khoảng báo cáo; biểu đồ theo tuần luôn cần cả tuần hiện tại
+  const fromDate = min([rangeStart(timeRange, today), startOfWeek(today, { weekStartsOn: 1 })])
+  const { data: history, isLoading, error } = useAttendanceHistory({ fromDate: format(fromDate, 'dd/MM/yyyy') })
   const { data: employees } = useEmployeeList()
+  const attendances = history?.results
 
   // Trả về các dữ liệu đã được xử lý cho biểu đồ
   return {
@@ -53,6 +94,9 @@ export const useAttendanceReport = (timeRange: string) => {
       statusDistribution: attendances ? generateStatusDistributionData(attendances) : null,
       departmentData: attendances ? generateDepartmentData(attendances, employees) : null
     },
+    // Dữ liệu dừng ở giới hạn số trang: số liệu báo cáo chưa đủ
+    truncated: history?.truncated ?? false,
+    count: attendances?.length ?? 0,
     isLoading,
     error
   }
@@ -61,21 +105,11 @@ export const useAttendanceReport = (timeRange: string) => {
 // Hàm tạo dữ liệu tổng quan
 const generateSummaryData = (attendances: AttendanceHistoryResponseType, timeRange: string) => {
   const today = new Date()
-  let filteredData = attendances
-
-  // Lọc dữ liệu theo thời gian được chọn
-  if (timeRange === 'daily') {
-    filteredData = attendances.filter((record) => record.date === format(today, 'yyyy-MM-dd'))
-  } else if (timeRange === 'weekly') {
-    const startDate = startOfWeek(today, { weekStartsOn: 1 }) // Tuần bắt đầu từ thứ 2
-    const endDate = endOfWeek(today, { weekStartsOn: 1 })
-    filteredData = attendances.filter((record) => {
-      const recordDate = parseISO(record.date)
-      return recordDate >= startDate && recordDate <= endDate
-    })
-  } else if (timeRange === 'monthly') {
-    filteredData = attendances.filter((record) => record.date.substring(0, 7) === format(today, 'yyyy-MM'))
-  }
+
+  // Lọc dữ liệu theo thời gian được chọn (dữ liệu tải về có thể bắt đầu từ đầu tuần, trước khoảng này)
+  const startDate = format(rangeStart(timeRange, today), 'yyyy-MM-dd')
+  const endDate = format(today, 'yyyy-MM-dd')
+  const filteredData = attendances.filter((record) => record.date >= startDate && record.date <= endDate)
 
   const total = filteredData.length
   const onTime = filteredData.filter((record) => record.status === AttendanceStatus.Present).length
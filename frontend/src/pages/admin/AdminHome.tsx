@@ -5,17 +5,25 @@ import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from '@
 import { Badge } from '@/components/ui/badge'
 import { format } from 'date-fns'
 import { Users, CalendarClock, UserCheck, Clock, AlertCircle, ChevronRight, Camera, Loader2 } from 'lucide-react'
-import { useAttendanceHistory, useEmployeeList } from '@/hooks/useAdmin'
+import { useAttendanceHistory, useEmployeeList, useRecentAttendance } from '@/hooks/useAdmin'
 import { useState, useEffect, useMemo } from 'react'
 import { formatDate, formatAttendanceTime } from '@/lib/utils'
 import { AttendanceStatus, AttendanceStatusLabels, DepartmentLabels } from '@/constants/type'
-import { AttendanceHistoryResponseType } from '@/schemas/admin.shema'
+import { TruncatedNotice } from '@/components/TruncatedNotice'
 
 export default function AdminHome() {
   const today = useMemo(() => new Date(), [])
 
-  // Lấy dữ liệu điểm danh từ API
-  const { data: attendances, isLoading: isLoadingAttendances, error: attendanceError } = useAttendanceHistory()
+  const todayParam = format(today, 'dd/MM/yyyy')
+
+  // Lấy dữ liệu điểm danh hôm nay và 5 bản ghi gần nhất từ API
+  const { data: todayHistory } = useAttendanceHistory({ fromDate: todayParam, toDate: todayParam })
+  const attendances = todayHistory?.results
+  const {
+    data: recentAttendance = [],
+    isLoading: isLoadingAttendances,
+    error: attendanceError
+  } = useRecentAttendance(5)
   const { data: employees } = useEmployeeList()
 
   // State để lưu trữ các số liệu thống kê
@@ -26,16 +34,13 @@ export default function AdminHome() {
     todayAbsent: 0
   })
 
-  // State để lưu trữ 5 bản ghi điểm danh gần nhất
-  const [recentAttendance, setRecentAttendance] = useState<AttendanceHistoryResponseType>([])
-
   // Tính toán số liệu thống kê khi dữ liệu thay đổi
   useEffect(() => {
     if (employees && attendances) {
       const totalEmployees = employees.length
 
-      // Lọc các bản ghi điểm danh cho ngày hôm nay
-      const todayAttendanceRecords = attendances.filter((record) => record.date === format(today, 'yyyy-MM-dd'))
+      // API đã lọc các bản ghi điểm danh cho ngày hôm nay
+      const todayAttendanceRecords = attendances
 
       // Đếm số người có mặt, đi muộn và vắng mặt
       const todayAttendance = todayAttendanceRecords.length
@@ -48,11 +53,8 @@ export default function AdminHome() {
         todayLate,
         todayAbsent
       })
-
-      // Lấy 5 bản ghi điểm danh gần nhất
-      setRecentAttendance(attendances.slice(0, 5))
     }
-  }, [employees, attendances, today])
+  }, [employees, attendances])
 
   return (
     <>
@@ -63,6 +65,8 @@ export default function AdminHome() {
         </p>
       </div>
 
+      {todayHistory?.truncated && <TruncatedNotice count={todayHistory.results.length} />}
+
       <div className='grid gap-4 md:grid-cols-2 lg:grid-cols-4'>
         <Card>
           <CardHeader className='flex flex-row items-center justify-between space-y-0 pb-2'>
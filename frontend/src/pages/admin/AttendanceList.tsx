@@ -11,10 +11,25 @@ import { format } from 'date-fns'
 import { vi } from 'date-fns/locale'
 import { Search, Calendar as CalendarIcon, Loader2 } from 'lucide-react'
 import { useAttendanceHistory } from '@/hooks/useAdmin'
-import { AttendanceHistoryItemType } from '@/schemas/admin.shema'
-import { AttendanceStatus, AttendanceStatusLabels, Department, DepartmentLabels } from '@/constants/type'
+import { AttendanceHistoryFilters, AttendanceHistoryItemType } from '@/schemas/admin.shema'
+import {
+  AttendanceStatus,
+  AttendanceStatusLabels,
+  AttendanceStatusType,
+  Department,
+  DepartmentLabels,
+  DepartmentType
+} from '@/constants/type'
 import { formatAttendanceTime } from '@/lib/utils'
 import { ExportExcelDialog } from '../../components/ExportExcelDialog'
+import { TruncatedNotice } from '@/components/TruncatedNotice'
+
+// Giá trị của bộ lọc trạng thái -> trạng thái gửi lên API
+const STATUS_FILTERS: Record<string, AttendanceStatusType> = {
+  'on-time': AttendanceStatus.Present,
+  late: AttendanceStatus.Late,
+  absent: AttendanceStatus.Absent
+}
 
 export default function AttendanceList() {
   const [searchTerm, setSearchTerm] = useState('')
@@ -22,33 +37,26 @@ export default function AttendanceList() {
   const [selectedDepartment, setSelectedDepartment] = useState<string>('all')
   const [selectedStatus, setSelectedStatus] = useState<string>('all')
 
+  // Ngày, phòng ban và trạng thái được lọc ở server
+  const selectedDay = selectedDate ? format(selectedDate, 'dd/MM/yyyy') : undefined
+  const filters: AttendanceHistoryFilters = {
+    fromDate: selectedDay,
+    toDate: selectedDay,
+    department: selectedDepartment === 'all' ? undefined : (selectedDepartment as DepartmentType),
+    status: STATUS_FILTERS[selectedStatus]
+  }
+
   // Gọi API lấy dữ liệu điểm danh
-  const { data: attendanceData, isLoading, isError } = useAttendanceHistory()
+  const { data: history, isLoading, isError } = useAttendanceHistory(filters)
+  const attendanceData = history?.results
 
+  // Lọc theo từ khóa tìm kiếm
   const filteredAttendance =
-    attendanceData?.filter((record: AttendanceHistoryItemType) => {
-      // Lọc theo từ khóa tìm kiếm
-      const matchesSearch =
+    attendanceData?.filter(
+      (record: AttendanceHistoryItemType) =>
         record.employee.employeeName.toLowerCase().includes(searchTerm.toLowerCase()) ||
         record.employee.department.toLowerCase().includes(searchTerm.toLowerCase())
-
-      // Lọc theo phòng ban
-      const matchesDepartment = selectedDepartment === 'all' || record.employee.department === selectedDepartment
-
-      // Lọc theo trạng thái
-      const matchesStatus =
-        selectedStatus === 'all' ||
-        (selectedStatus === 'on-time' && record.status === AttendanceStatus.Present) ||
-        (selectedStatus === 'late' && record.status === AttendanceStatus.Late) ||
-        (selectedStatus === 'absent' && record.status === AttendanceStatus.Absent)
-
-      // Lọc theo ngày (nếu có)
-      const recordDate = record.date.split('T')[0]
-      const formattedSelectedDate = selectedDate ? format(selectedDate, 'yyyy-MM-dd') : null
-      const matchesDate = !formattedSelectedDate || recordDate === formattedSelectedDate
-
-      return matchesSearch && matchesDepartment && matchesStatus && matchesDate
-    }) || []
+    ) || []
 
   // Tính toán thống kê
   const totalEmployees = filteredAttendance.length
@@ -65,6 +73,7 @@ export default function AttendanceList() {
         <h1 className='text-2xl font-bold tracking-tight'>Lịch sử điểm danh</h1>
         <p className='text-muted-foreground'>Xem và quản lý lịch sử điểm danh của nhân viên theo ngày.</p>
       </div>
+      {history?.truncated && <TruncatedNotice count={history.results.length} />}
       <Card>
         <CardHeader className='pb-3'>
           <div className='flex flex-col md:flex-row md:items-center md:justify-between gap-4'>
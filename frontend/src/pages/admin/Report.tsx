@@ -18,13 +18,14 @@ import {
 } from 'recharts'
 import { useAttendanceReport } from '@/hooks/useAdmin'
 import { Loader2 } from 'lucide-react'
+import { TruncatedNotice } from '@/components/TruncatedNotice'
 
 // Component báo cáo
 export default function Reports() {
   const [timeRange, setTimeRange] = useState('weekly')
 
   // Lấy dữ liệu báo cáo từ API
-  const { data, isLoading, error } = useAttendanceReport(timeRange)
+  const { data, truncated, count, isLoading, error } = useAttendanceReport(timeRange)
 
   // Tạo dữ liệu cho biểu đồ sử dụng useMemo để tối ưu hóa hiệu năng
   const reportData = useMemo(() => {
@@ -52,6 +53,8 @@ export default function Reports() {
         <p className='text-muted-foreground'>Xem báo cáo, thống kê và phân tích dữ liệu điểm danh theo thời gian.</p>
       </div>
 
+      {truncated && <TruncatedNotice count={count} />}
+
       <div className='flex items-center justify-between mb-4'>
         <Tabs defaultValue='attendance' className='w-full'>
           <div className='flex items-center justify-between mb-4'>
@@ -15,6 +15,7 @@ import { useAttendanceHistory } from '@/hooks/useEmployee'
 import { AttendanceRecordType } from '@/schemas/employee.shema'
 import { AttendanceStatus, AttendanceStatusLabels } from '@/constants/type'
 import { Skeleton } from '@/components/ui/skeleton'
+import { TruncatedNotice } from '@/components/TruncatedNotice'
 
 interface UIAttendanceRecord {
   id: string
@@ -30,7 +31,8 @@ export default function EmployeeAttendance() {
   const [searchQuery, setSearchQuery] = useState('')
   const [statusFilter, setStatusFilter] = useState<string>('all')
 
-  const { data, isLoading, error } = useAttendanceHistory()
+  const { data: history, isLoading, error } = useAttendanceHistory()
+  const data = history?.results
 
   // Chuyển đổi dữ liệu API sang định dạng UI bằng useMemo
   const attendanceRecords = useMemo(() => {
@@ -153,6 +155,8 @@ export default function EmployeeAttendance() {
         </div>
       </div>
 
+      {history?.truncated && <TruncatedNotice count={history.results.length} />}
+
       {/* Thẻ thống kê */}
       {isLoading ? (
         <StatisticsSkeleton />
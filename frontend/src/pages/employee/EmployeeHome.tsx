@@ -5,12 +5,14 @@ import { useAttendanceHistory } from '@/hooks/useEmployee'
 import { formatAttendanceTime, formatDate } from '@/lib/utils'
 import { AttendanceStatusLabels } from '@/constants/type'
 import { Loader2 } from 'lucide-react'
+import { TruncatedNotice } from '@/components/TruncatedNotice'
 
 export default function EmployeeHome() {
   const [date, setDate] = useState<Date | undefined>(new Date())
 
   // Lấy dữ liệu điểm danh từ API
-  const { data: attendanceHistory, isLoading } = useAttendanceHistory()
+  const { data: history, isLoading } = useAttendanceHistory()
+  const attendanceHistory = history?.results
 
   // Tìm bản ghi điểm danh của ngày hôm nay
   const today = new Date().toISOString().split('T')[0] // Format YYYY-MM-DD
@@ -26,6 +28,8 @@ export default function EmployeeHome() {
     <div className='space-y-6'>
       <h1 className='text-3xl font-bold'>Chào mừng!</h1>
 
+      {history?.truncated && <TruncatedNotice count={history.results.length} />}
+
       <div className='grid gap-6 md:grid-cols-2 lg:grid-cols-3'>
         <Card>
           <CardHeader>
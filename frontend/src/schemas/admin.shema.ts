@@ -1,4 +1,13 @@
-import { AttendanceStatus, Department, DepartmentValues, PositionValues, Status, StatusValues } from '@/constants/type'
+import {
+  AttendanceStatus,
+  AttendanceStatusType,
+  Department,
+  DepartmentType,
+  DepartmentValues,
+  PositionValues,
+  Status,
+  StatusValues
+} from '@/constants/type'
 
 import { z } from 'zod'
 
@@ -27,6 +36,15 @@ export const AttendanceHistoryResponseSchema = z.array(AttendanceHistoryItemSche
 
 export type AttendanceHistoryResponseType = z.infer<typeof AttendanceHistoryResponseSchema>
 
+// Bộ lọc của API lịch sử điểm danh (ngày theo định dạng dd/MM/yyyy)
+export type AttendanceHistoryFilters = {
+  fromDate?: string
+  toDate?: string
+  department?: DepartmentType
+  status?: AttendanceStatusType
+  employee_code?: string
+}
+
 // Thêm schema cho User
 export const EmployeeDetailSchema = z.object({
   gender: z.string().nullable(),
@@ -1,8 +1,11 @@
 import api from '@/api/axios'
+import { fetchAllPages, fetchPage, PagedResult } from '@/utils/pagination'
 import {
   AttendanceConfigFormValues,
   AttendanceConfigSchema,
   AttendanceConfigType,
+  AttendanceHistoryFilters,
+  AttendanceHistoryItemType,
   AttendanceHistoryResponseSchema,
   AttendanceHistoryResponseType,
   CreateEmployeeFormValues,
@@ -16,11 +19,21 @@ import {
 } from '@/schemas/admin.shema'
 
 export const adminService = {
-  getHistory: async (): Promise<AttendanceHistoryResponseType> => {
-    const res = await api.get('/attendance/history')
+  getHistory: async (filters: AttendanceHistoryFilters = {}): Promise<PagedResult<AttendanceHistoryItemType>> => {
+    // Lọc ở server, chỉ tải các trang khớp bộ lọc (tối đa 500 bản ghi mỗi trang)
+    const { results, truncated } = await fetchAllPages('/attendance/history', { limit: 500, ...filters })
 
     // Xác thực dữ liệu trả về
-    const parsed = AttendanceHistoryResponseSchema.parse(res.data)
+    const parsed = AttendanceHistoryResponseSchema.parse(results)
+    return { results: parsed, truncated }
+  },
+
+  // Các bản ghi điểm danh mới nhất: chỉ tải trang đầu tiên
+  getRecentHistory: async (limit: number): Promise<AttendanceHistoryResponseType> => {
+    const page = await fetchPage('/attendance/history', { limit })
+
+    // Xác thực dữ liệu trả về
+    const parsed = AttendanceHistoryResponseSchema.parse(page.results)
     return parsed
   },
 
@@ -1,7 +1,8 @@
 import api from '@/api/axios'
+import { fetchAllPages, PagedResult } from '@/utils/pagination'
 import {
   AttendanceHistoryResponse,
-  AttendanceHistoryResponseType,
+  AttendanceRecordType,
   ProfileRes,
   ProfileResType,
   ProfileUpdateBodyType,
@@ -42,11 +43,12 @@ export const employeeService = {
     return parsed
   },
 
-  getHistory: async (): Promise<AttendanceHistoryResponseType> => {
-    const res = await api.get('/attendance/history')
+  getHistory: async (): Promise<PagedResult<AttendanceRecordType>> => {
+    // API trả về từng trang (tối đa 500 bản ghi mỗi trang), fetchAllPages giới hạn số trang tải
+    const { results, truncated } = await fetchAllPages('/attendance/history', { limit: 500 })
 
     // Xác thực dữ liệu trả về
-    const parsed = AttendanceHistoryResponse.parse(res.data)
-    return parsed
+    const parsed = AttendanceHistoryResponse.parse(results)
+    return { results: parsed, truncated }
   }
 }
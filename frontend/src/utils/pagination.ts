@@ -0,0 +1,55 @@
+/**
+ * Tiện ích cho các API phân trang theo con trỏ (vd. /attendance/history)
+ */
+
+import api from '@/api/axios'
+
+// Số trang tối đa fetchAllPages tải trong một lần gọi: các màn hình lọc theo ngày / phòng ban / trạng thái
+// bằng tham số của API, giới hạn này chỉ chặn việc vô tình tải cả bảng
+export const MAX_PAGES = 20
+
+type PageParams = Record<string, string | number | undefined>
+
+export interface CursorPage<T> {
+  results: T[]
+  next: string | null
+}
+
+// Kết quả của fetchAllPages; truncated: dừng ở maxPages trang khi vẫn còn trang sau (dữ liệu chưa đủ)
+export interface PagedResult<T> {
+  results: T[]
+  truncated: boolean
+}
+
+/**
+ * Lấy một trang, cursor lấy từ trường "next" của trang trước (bỏ trống cho trang đầu)
+ */
+export const fetchPage = async <T = unknown>(
+  url: string,
+  params: PageParams = {},
+  cursor?: string | null
+): Promise<CursorPage<T>> => {
+  const res = await api.get<CursorPage<T>>(url, { params: cursor ? { ...params, cursor } : params })
+  return res.data
+}
+
+/**
+ * Lấy lần lượt các trang theo con trỏ trong trường "next", tối đa maxPages trang.
+ * Màn hình gọi hàm này cần báo cho người dùng khi truncated là true
+ */
+export const fetchAllPages = async <T = unknown>(
+  url: string,
+  params: PageParams = {},
+  maxPages: number = MAX_PAGES
+): Promise<PagedResult<T>> => {
+  const results: T[] = []
+  let cursor: string | null = null
+  let pages = 0
+  do {
+    const page: CursorPage<T> = await fetchPage<T>(url, params, cursor)
+    results.push(...page.results)
+    cursor = page.next ? new URL(page.next).searchParams.get('cursor') : null
+    pages += 1
+  } while (cursor && pages < maxPages)
+  return { results, truncated: cursor !== null }
+}